@@ -1,22 +1,12 @@
-import requests
+import os
+import sys
 import config
 import csv
 from bs4 import BeautifulSoup
 from datetime import datetime
 
-# eBay Trading API endpoint
-EBAY_API_URL = "https://api.ebay.com/ws/api.dll"  # Use sandbox URL for testing: https://api.sandbox.ebay.com/ws/api.dll
-
-# eBay headers
-HEADERS = {
-    "X-EBAY-API-COMPATIBILITY-LEVEL": "967",  # Use the latest version
-    "X-EBAY-API-DEV-NAME": config.EBAY_DEV_ID,
-    "X-EBAY-API-APP-NAME": config.EBAY_APP_ID,
-    "X-EBAY-API-CERT-NAME": config.EBAY_CERT_ID,
-    "X-EBAY-API-CALL-NAME": "GetMyeBaySelling",
-    "X-EBAY-API-SITEID": "0",  # 0 for US, change for other regions
-    "Content-Type": "text/xml"
-}
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from ebay_client import trading_post
 
 # XML payload for GetMyeBaySelling (Fetching Sold Items)
 XML_PAYLOAD = f"""<?xml version="1.0" encoding="utf-8"?>
@@ -35,7 +25,8 @@ XML_PAYLOAD = f"""<?xml version="1.0" encoding="utf-8"?>
 </GetMyeBaySellingRequest>"""
 
 # Make the request
-response = requests.post(EBAY_API_URL, headers=HEADERS, data=XML_PAYLOAD)
+response = trading_post("GetMyeBaySelling", XML_PAYLOAD,
+                        dev_id=config.EBAY_DEV_ID, app_id=config.EBAY_APP_ID, cert_id=config.EBAY_CERT_ID)
 
 # Print response
 if response.status_code == 200:
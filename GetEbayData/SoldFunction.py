@@ -1,10 +1,13 @@
-import requests
 import json
 import config
 import csv
 from bs4 import BeautifulSoup
 from datetime import datetime
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from ebay_client import trading_post, fetch_all_transactions
 
 ############################
 # STEP 1: GET TRANSACTIONS #
@@ -15,32 +18,18 @@ def get_transactions():
     Retrieves all transactions from the eBay Finances API and groups them by order.
     Overwrites the CSV file "ebay_transactions_grouped.csv".
     """
-    EBAY_API_URL = "https://apiz.ebay.com/sell/finances/v1/transaction"
     HEADERS = {
         "Authorization": f"Bearer {config.ACCESS_TOKEN}",
         "Content-Type": "application/json",
         "Accept": "application/json"
     }
-    limit = 1000
-    offset = 0
-    PARAMS = {
-        "transaction_type": "ALL",
-        "limit": limit,
-        "offset": offset
-    }
-    all_transactions = []
-    while True:
-        PARAMS["offset"] = offset
-        response = requests.get(EBAY_API_URL, headers=HEADERS, params=PARAMS)
-        if response.status_code != 200:
-            print("Error retrieving transactions:", response.status_code, response.text)
-            break
-        data = response.json()
-        transactions = data.get("transactions", [])
-        if not transactions:
-            break
-        all_transactions.extend(transactions)
-        offset += limit
+    # Page 1 first, then the remaining offsets concurrently
+    try:
+        all_transactions = fetch_all_transactions(HEADERS, {"transaction_type": "ALL"})
+    except RuntimeError as e:
+        print("Error retrieving transactions:", e)
+        # Keep the pages fetched before the failure
+        all_transactions = e.transactions
 
     # Group transactions by order ID.
     orders = {}
@@ -162,17 +151,6 @@ def get_sold_list():
     """
     Retrieves sold items data using the GetMyeBaySelling API call and writes it to sold_list.csv.
     """
-    EBAY_API_URL = "https://api.ebay.com/ws/api.dll"  # For production; for sandbox, use appropriate URL
-    HEADERS = {
-        "X-EBAY-API-COMPATIBILITY-LEVEL": "967",
-        "X-EBAY-API-DEV-NAME": config.EBAY_DEV_ID,
-        "X-EBAY-API-APP-NAME": config.EBAY_APP_ID,
-        "X-EBAY-API-CERT-NAME": config.EBAY_CERT_ID,
-        "X-EBAY-API-CALL-NAME": "GetMyeBaySelling",
-        "X-EBAY-API-SITEID": "0",
-        "Content-Type": "text/xml"
-    }
-    
     XML_PAYLOAD = f"""<?xml version="1.0" encoding="utf-8"?>
     <GetMyeBaySellingRequest xmlns="urn:ebay:apis:eBLBaseComponents">
         <RequesterCredentials>
@@ -188,7 +166,8 @@ def get_sold_list():
         </SoldList>
     </GetMyeBaySellingRequest>"""
     
-    response = requests.post(EBAY_API_URL, headers=HEADERS, data=XML_PAYLOAD)
+    response = trading_post("GetMyeBaySelling", XML_PAYLOAD,
+                            dev_id=config.EBAY_DEV_ID, app_id=config.EBAY_APP_ID, cert_id=config.EBAY_CERT_ID)
     csv_file = "SOLD_LISTINGS.csv"
     if response.status_code == 200:
         soup = BeautifulSoup(response.text, "xml")
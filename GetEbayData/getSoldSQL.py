@@ -1,17 +1,21 @@
-import sqlite3
-import requests
+import os
+import sys
 import json
 import config
 import csv
 from bs4 import BeautifulSoup
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from ebay_client import trading_post, fetch_all_transactions
+from db_conn import connect
+
 ############################
 # DATABASE SETUP           #
 ############################
 
 # Connect to (or create) a local SQLite database file
-conn = sqlite3.connect('tally0.db')
+conn = connect('tally0.db')
 cursor = conn.cursor()
 
 # Create a table for transactions from the Finances API
@@ -76,32 +80,17 @@ def get_transactions_data():
     Retrieve transactions from the Finances API, group them by order,
     and insert them into the 'transactions' table.
     """
-    EBAY_API_URL = "https://apiz.ebay.com/sell/finances/v1/transaction"
     HEADERS = {
         "Authorization": f"Bearer {config.ACCESS_TOKEN}",
         "Content-Type": "application/json",
         "Accept": "application/json"
     }
-    limit = 1000
-    offset = 0
-    PARAMS = {
-        "transaction_type": "ALL",
-        "limit": limit,
-        "offset": offset
-    }
-    all_transactions = []
-    while True:
-        PARAMS["offset"] = offset
-        response = requests.get(EBAY_API_URL, headers=HEADERS, params=PARAMS)
-        if response.status_code != 200:
-            print("Error retrieving transactions:", response.status_code, response.text)
-            break
-        data = response.json()
-        transactions = data.get("transactions", [])
-        if not transactions:
-            break
-        all_transactions.extend(transactions)
-        offset += limit
+    try:
+        all_transactions = fetch_all_transactions(HEADERS, {"transaction_type": "ALL"})
+    except RuntimeError as e:
+        print("Error retrieving transactions:", e)
+        # Keep the pages fetched before the failure
+        all_transactions = e.transactions
 
     # Insert each transaction record into the transactions table.
     # For this example, we'll extract a subset of fields from each transaction.
@@ -189,17 +178,6 @@ def get_sold_list_data():
     """
     Retrieves sold items data from GetMyeBaySelling and inserts it into the sold_items table.
     """
-    EBAY_API_URL = "https://api.ebay.com/ws/api.dll"
-    HEADERS = {
-        "X-EBAY-API-COMPATIBILITY-LEVEL": "967",
-        "X-EBAY-API-DEV-NAME": config.EBAY_DEV_ID,
-        "X-EBAY-API-APP-NAME": config.EBAY_APP_ID,
-        "X-EBAY-API-CERT-NAME": config.EBAY_CERT_ID,
-        "X-EBAY-API-CALL-NAME": "GetMyeBaySelling",
-        "X-EBAY-API-SITEID": "0",
-        "Content-Type": "text/xml"
-    }
-    
     XML_PAYLOAD = f"""<?xml version="1.0" encoding="utf-8"?>
     <GetMyeBaySellingRequest xmlns="urn:ebay:apis:eBLBaseComponents">
         <RequesterCredentials>
@@ -215,7 +193,8 @@ def get_sold_list_data():
         </SoldList>
     </GetMyeBaySellingRequest>"""
     
-    response = requests.post(EBAY_API_URL, headers=HEADERS, data=XML_PAYLOAD)
+    response = trading_post("GetMyeBaySelling", XML_PAYLOAD,
+                            dev_id=config.EBAY_DEV_ID, app_id=config.EBAY_APP_ID, cert_id=config.EBAY_CERT_ID)
     if response.status_code != 200:
         print("Error retrieving sold list:", response.status_code, response.text)
         return
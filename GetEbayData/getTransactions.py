@@ -1,10 +1,11 @@
-import requests
+import os
+import sys
 import json
 import config
 import csv
 
-# eBay Finances API endpoint for getTransactions
-EBAY_API_URL = "https://apiz.ebay.com/sell/finances/v1/transaction"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from ebay_client import fetch_all_transactions
 
 # Headers for the request
 HEADERS = {
@@ -13,31 +14,13 @@ HEADERS = {
     "Accept": "application/json"
 }
 
-# Pagination parameters
-limit = 1000
-offset = 0
-PARAMS = {
-    "transaction_type": "ALL",
-    "limit": limit,
-    "offset": offset
-}
-
-# Retrieve all transactions across pages
-all_transactions = []
-while True:
-    PARAMS["offset"] = offset
-    response = requests.get(EBAY_API_URL, headers=HEADERS, params=PARAMS)
-    if response.status_code != 200:
-        print("Error:", response.status_code, response.text)
-        break
-
-    data = response.json()
-    transactions = data.get("transactions", [])
-    if not transactions:
-        break
-
-    all_transactions.extend(transactions)
-    offset += limit
+# Retrieve all transactions across pages (page 1 first, the rest concurrently)
+try:
+    all_transactions = fetch_all_transactions(HEADERS, {"transaction_type": "ALL"})
+except RuntimeError as e:
+    print("Error:", e)
+    # Keep the pages fetched before the failure
+    all_transactions = e.transactions
 
 # Group transactions by order ID.
 orders = {}
@@ -3,11 +3,31 @@ from dotenv import load_dotenv
 import base64
 import requests
 from urllib.parse import urlencode
-from flask import Flask, jsonify, render_template, redirect, request, session, url_for
+from flask import Flask, g, jsonify, make_response, render_template, redirect, request, session, url_for
 from datetime import timedelta, datetime
-import sqlite3
-from bs4 import BeautifulSoup
 import time
+import hashlib
+import math
+import sqlite3
+import threading
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from db_conn import ConnectionPool, connect
+from migrations import migrate
+from daily_stats import refresh_daily_stats
+from sold_metrics import refresh_sold_metrics
+from transactions_grouped import event_row, refresh_transactions_grouped, store_events
+from dirty_keys import has_dirty
+from data_version import VersionWatch, bump_data_version, get_data_version
+from result_cache import ResultCache
+from list_query import SOLD_ITEMS, INVENTORY_ITEMS, export_batches, list_page
+from streaming import NDJSON_MIMETYPE, iter_batches, json_array, ndjson
+from db_writer import SerialWriter, begin
+from payload_archive import ENABLED as ARCHIVE_ENABLED, archive_for, archive_path
+from sync_jobs import SyncJobRunner
+from ebay_xml import parse_active_items, parse_sold_transactions, parse_order_transactions
+from rate_limit import QuotaExceeded
+from ebay_client import ebay_url, ebay_request, budget, trading_post, iter_transaction_pages, fetch_workers, connection_stats
 
 # Determine the directory where this file is located
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -21,6 +41,155 @@ load_dotenv(dotenv_path)
 
 app = Flask(__name__)
 
+# Background eBay sync jobs (POST /api/sync)
+sync_runner = SyncJobRunner()
+
+# SQLite connections reused across requests (see get_db)
+db_pool = ConnectionPool()
+
+# Insights responses, keyed by date range and invalidated by data_version
+insights_cache = ResultCache()
+
+# Data version as last read, for the read APIs' ETags (see conditional)
+version_watch = VersionWatch()
+
+# Derived-table refreshes noticed by read requests (see schedule_refresh)
+refresh_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="derived-refresh")
+_refresh_pending = set()
+_refresh_lock = threading.Lock()
+
+
+def get_db():
+    """
+    The current request's SQLite connection, taken from db_pool on first
+    use and handed back when the app context is torn down.
+    """
+    if "db" not in g:
+        g.db = db_pool.acquire(db_path)
+    return g.db
+
+
+@app.teardown_appcontext
+def release_db(exc):
+    conn = g.pop("db", None)
+    if conn is not None:
+        db_pool.release(conn)
+
+
+def refresh_derived(path):
+    """
+    Fold pending sold item metrics and daily_stats days of the database at
+    path into their tables, on a connection of its own. Runs on
+    refresh_pool.
+    """
+    try:
+        conn = connect(path)
+        try:
+            cursor = conn.cursor()
+            refresh_sold_metrics(cursor)
+            refresh_daily_stats(cursor)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Refreshing derived tables failed: {e}")
+    finally:
+        with _refresh_lock:
+            _refresh_pending.discard(path)
+
+
+def schedule_refresh(cursor):
+    """
+    If writes made outside the app (or a sync still running) left sold item
+    metrics or daily_stats days pending, refresh them on refresh_pool. The
+    check only reads and nothing waits on the refresh, so a read request
+    never takes the write lock; its bump shows up in the next request's
+    version.
+    """
+    if not (has_dirty(cursor, "sold_metrics_dirty") or has_dirty(cursor, "daily_stats_dirty")):
+        return
+    with _refresh_lock:
+        if db_path in _refresh_pending:
+            return
+        _refresh_pending.add(db_path)
+    refresh_pool.submit(refresh_derived, db_path)
+
+
+def current_data_version():
+    """
+    (version, last modified) of the data, from version_watch: the database
+    is only queried when its files changed. Pending derived rows are
+    handed to schedule_refresh rather than folded in here, so this only
+    reads.
+    """
+    def read():
+        cursor = get_db().cursor()
+        schedule_refresh(cursor)
+        return get_data_version(cursor)
+    return version_watch.current(db_path, read)
+
+
+def conditional(view):
+    """
+    Give a read API's responses a strong ETag (data version + path + query)
+    and Last-Modified, and answer a request that already holds the current
+    copy with 304 Not Modified, without running the view.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version, modified = current_data_version()
+        # Routes default their date range to today, so the date is part of it
+        key = f"{request.path}?{sorted(request.args.items(multi=True))}@{datetime.utcnow().date()}"
+        etag = f"{version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"
+
+        if request.if_none_match:
+            fresh = request.if_none_match.contains(etag)
+        else:
+            fresh = request.if_modified_since is not None and modified <= request.if_modified_since
+        if fresh:
+            response = app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.last_modified = modified
+        # The data changes with every sync: always revalidate
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
+
+
+def migrate_db(path=None):
+    """
+    Create the database (default db_path) or bring its schema up to date
+    (see migrations.py).
+    """
+    conn = connect(path or db_path)
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
+
+
+# Databases migrated by this process (see migrate_once)
+_migrated = set()
+_migrate_lock = threading.Lock()
+
+
+@app.before_request
+def migrate_once():
+    """
+    Migrate db_path before the first request this process serves for it.
+    Not done at import, so scripts importing this module (reprocess.py,
+    the benchmarks) can point db_path elsewhere first.
+    """
+    if db_path in _migrated:
+        return
+    with _migrate_lock:
+        if db_path not in _migrated:
+            migrate_db()
+            _migrated.add(db_path)
+
 # Use a strong random value for the secret key or load it from your environment
 app.secret_key = os.environ.get("FLASK_SECRET_KEY")
 
@@ -40,6 +209,7 @@ EBAY_REDIRECT_URI = os.environ.get("EBAY_REDIRECT_URI")
 # OAuth endpoints
 EBAY_OAUTH_URL = "https://auth.ebay.com/oauth2/authorize"
 EBAY_TOKEN_URL = "https://api.ebay.com/identity/v1/oauth2/token"
+EBAY_IDENTITY_URL = "https://apiz.ebay.com/commerce/identity/v1/user/"
 
 # Define the scope of access you need (space-separated list)
 EBAY_SCOPES = ("https://api.ebay.com/oauth/api_scope "
@@ -74,10 +244,7 @@ def ping():
 
 @app.route('/init-db')
 def init_db():
-    schema_file = os.path.join(project_root, 'db', 'schema.sql')
-    with sqlite3.connect(db_path) as conn:
-        with open(schema_file, 'r') as f:
-            conn.executescript(f.read())
+    migrate(get_db())
     return f"Initialized DB at {db_path}", 200
 
 @app.route('/api/test')
@@ -95,7 +262,7 @@ def ebay_login():
     }
     # Encode query parameters safely
     query_string = urlencode(params)
-    auth_url = f"{EBAY_OAUTH_URL}?{query_string}"
+    auth_url = f"{ebay_url(EBAY_OAUTH_URL)}?{query_string}"
     
     # Redirect the user to the constructed OAuth URL
     return redirect(auth_url)
@@ -119,8 +286,10 @@ def ebay_callback():
         "redirect_uri": EBAY_REDIRECT_URI
     }
 
-    # Exchange the authorization code for an access token
-    token_response = requests.post(EBAY_TOKEN_URL, headers=headers, data=payload)
+    # Exchange the authorization code for an access token. The code is
+    # single-use, so a failed exchange isn't retried.
+    token_response = ebay_request("oauth", "token", "POST", EBAY_TOKEN_URL, retry=False,
+                                  headers=headers, data=payload)
     if token_response.status_code != 200:
         return f"Error fetching token: {token_response.text}", 400
 
@@ -130,6 +299,7 @@ def ebay_callback():
     # these tokens will be stored as signed cookies (client-side) for the duration of the session.
     session['access_token'] = token_data.get('access_token')
     session['refresh_token'] = token_data.get('refresh_token')
+    session['seller_id'] = get_seller_id(session['access_token'])
 
     # Redirect to the dashboard or home page upon successful login
     return redirect(url_for('dashboard'))
@@ -163,28 +333,90 @@ def insights():
 # Helper Functions for Proxying   #
 ###################################
 
-def get_inventory_data(cursor, access_token):
+def upsert_inventory_items(cursor, pages):
     """
-    Retrieve active inventory items from eBay (GetMyeBaySelling → ActiveList),
-    and upsert them into an SQLite table 'inventory_items'.
+    Upsert parsed ActiveList pages (lists of row tuples) into
+    'inventory_items' in one transaction, one executemany per page
+    (manual columns such as item_cost are preserved).
     """
-    EBAY_API_URL = "https://api.ebay.com/ws/api.dll"
-    EBAY_DEV_ID  = os.environ.get("EBAY_DEV_ID")
-    EBAY_APP_ID  = os.environ.get("EBAY_APP_ID")
-    EBAY_CERT_ID = os.environ.get("EBAY_CERT_ID")
+    begin(cursor)
+    for rows in pages:
+        cursor.executemany("""
+        INSERT INTO inventory_items (
+          item_id, item_title, photo_url, list_price,
+          list_date, item_cost, available_quantity,
+          purchased_at, sku, storage_location
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(item_id) DO UPDATE SET
+          item_title        = excluded.item_title,
+          photo_url         = excluded.photo_url,
+          list_price        = excluded.list_price,
+          list_date         = excluded.list_date,
+          sku               = excluded.sku,
+          available_quantity= excluded.available_quantity;
+        """, rows)
+    bump_data_version(cursor)
+    cursor.connection.commit()
+
+
+def parse_active_list_rows(content):
+    """
+    Parse one ActiveList page into 'inventory_items' row tuples.
+    """
+    rows = []
+    for item in parse_active_items(content):
+        # Extract fields (with safe defaults)
+        item_id     = item.get("ItemID")
+        title       = item.get("Title", "")
+        photo_url   = item.get("PictureDetails", "")
+        price       = item.get("CurrentPrice", item.get("BuyItNowPrice"))
+        list_price  = float(price) if price else 0.0
+        start_time  = item.get("StartTime", "")
+        # blank placeholders for manual columns
+        item_cost          = None
+        purchased_at       = None
+        storage_loc        = None
+        sku                = item.get("SKU", "")
+        qty_avail          = int(item["QuantityAvailable"]) if "QuantityAvailable" in item else 0
+
+        rows.append((
+          item_id, title, photo_url, list_price,
+          start_time, item_cost, qty_avail,
+          purchased_at, sku, storage_loc
+        ))
+    return rows
+
+
+def archive_payload(kind, body):
+    """
+    Keep a raw eBay response body in the payload archive, for reprocess.py
+    (see payload_archive.py).
+    """
+    if ARCHIVE_ENABLED:
+        archive_for(archive_path(db_path)).store(kind, body)
 
-    headers = {
-        "X-EBAY-API-COMPATIBILITY-LEVEL": "967",
-        "X-EBAY-API-DEV-NAME":            EBAY_DEV_ID,
-        "X-EBAY-API-APP-NAME":            EBAY_APP_ID,
-        "X-EBAY-API-CERT-NAME":           EBAY_CERT_ID,
-        "X-EBAY-API-CALL-NAME":           "GetMyeBaySelling",
-        "X-EBAY-API-SITEID":              "0",
-        "Content-Type":                   "text/xml",
-    }
 
+def prune_archive():
+    """
+    Drop archived fetches past the payload archive's retention.
+    """
+    if ARCHIVE_ENABLED:
+        n_fetches, n_bodies = archive_for(archive_path(db_path)).prune()
+        if n_fetches:
+            print(f"Pruned {n_fetches} archived fetches ({n_bodies} bodies) from the payload archive.")
+
+
+def get_inventory_data(writer, job, access_token):
+    """
+    Retrieve active inventory items from eBay (GetMyeBaySelling → ActiveList),
+    and upsert them into an SQLite table 'inventory_items'.
+    Pages are parsed into row tuples as they arrive and written in a single
+    transaction once the whole list is in, so the write lock is only held
+    for the write itself, not for the network round trips.
+    """
+    job.begin("inventory")
     page = 1
-    total = 0
+    pages = []
 
     while True:
         # 1) Build the XML asking for the gallery URL as well
@@ -202,240 +434,267 @@ def get_inventory_data(cursor, access_token):
         </ActiveList>
         </GetMyeBaySellingRequest>"""
 
-        resp = requests.post(EBAY_API_URL, headers=headers, data=xml)
+        resp = trading_post("GetMyeBaySelling", xml)
         if resp.status_code != 200:
-            print("Error fetching inventory (page", page, "):", resp.status_code, resp.text)
-            break
-
-        soup = BeautifulSoup(resp.text, "xml")
-        active = soup.find("ActiveList")
-        if not active:
-            break
+            raise RuntimeError(f"eBay GetMyeBaySelling ActiveList page {page} failed "
+                               f"({resp.status_code}): {resp.text}")
+        job.page_fetched("inventory")
+        archive_payload("active_list", resp.content)
 
-        items = active.find_all("Item")
-        if not items:
+        rows = parse_active_list_rows(resp.content)
+        if not rows:
             break
 
-        for item in items:
-            # Extract fields (with safe defaults)
-            item_id     = item.find("ItemID").text if item.find("ItemID") else None
-            title       = item.find("Title").text  if item.find("Title") else ""
-            photo_url = item.find("PictureDetails").text if item.find("PictureDetails") else ""
-            price       = item.find("CurrentPrice") or item.find("BuyItNowPrice")
-            list_price  = float(price.text) if (price and price.text) else 0.0
-            start_time  = item.find("StartTime").text if item.find("StartTime") else ""
-            # blank placeholders for manual columns
-            item_cost          = None
-            purchased_at       = None
-            storage_loc        = None
-            sku                = item.find("SKU").text if item.find("SKU") else ""
-            qty_avail          = int(item.find("QuantityAvailable").text) if item.find("QuantityAvailable") else 0
-
-            # Upsert into SQLite
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS inventory_items (
-              item_id           TEXT    PRIMARY KEY,
-              item_title        TEXT,
-              photo_url         TEXT,
-              list_price        REAL,
-              list_date         TEXT,
-              item_cost         REAL,
-              available_quantity INTEGER,
-              purchased_at      TEXT,
-              sku               TEXT,
-              storage_location TEXT
-            );
-            """)
-            cursor.execute("""
-            INSERT INTO inventory_items (
-              item_id, item_title, photo_url, list_price,
-              list_date, item_cost, available_quantity,
-              purchased_at, sku, storage_location
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(item_id) DO UPDATE SET
-              item_title        = excluded.item_title,
-              photo_url         = excluded.photo_url,
-              list_price        = excluded.list_price,
-              list_date         = excluded.list_date,
-              sku               = excluded.sku,
-              available_quantity= excluded.available_quantity;
-            """, (
-              item_id, title, photo_url, list_price,
-              start_time, item_cost, qty_avail,
-              purchased_at, sku, storage_loc
-            ))
-            total += 1
-
+        pages.append(rows)
         page += 1
 
+    writer.call(upsert_inventory_items, pages)
+    total = sum(len(rows) for rows in pages)
+    job.rows_stored("inventory", total)
+    job.end("inventory")
     print(f"Upserted {total} inventory items into 'inventory_items'.")
 
 
-def get_transactions_data(cursor, access_token):
+# Finances API transactions can post a little after their transactionDate
+# (labels, refunds), so incremental runs re-read this much before the mark.
+TRANSACTIONS_SYNC_OVERLAP = timedelta(days=3)
+
+
+def get_seller_id(access_token):
     """
-    Retrieve transactions from the eBay Finances API,
-    group them by order (one value per txn type),
-    and insert into SQLite table 'transactions_grouped'.
+    Look up the eBay user id for this token (Commerce Identity API).
+    Used to key the per-seller sync state; returns None if the call fails.
     """
-    EBAY_API_URL = "https://apiz.ebay.com/sell/finances/v1/transaction"
     headers = {
         "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
         "Accept": "application/json",
-        "X-EBAY-C-MARKETPLACE-ID": "EBAY_US",
     }
+    try:
+        resp = ebay_request("identity", "getUser", "GET", EBAY_IDENTITY_URL, headers=headers)
+    except (requests.RequestException, QuotaExceeded) as e:
+        print("Error fetching seller identity:", e)
+        return None
+    if resp.status_code != 200:
+        print("Error fetching seller identity:", resp.status_code, resp.text)
+        return None
+    return resp.json().get("userId")
+
+
+def get_sync_state(cursor, seller_id, resource):
+    """
+    Return the stored high-water mark for (seller_id, resource), or None.
+    """
+    cursor.execute(
+        "SELECT high_water_mark FROM sync_state WHERE seller_id=? AND resource=?",
+        (seller_id, resource)
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
 
-    # 1) Fetch all transactions
-    limit, offset = 1000, 0
-    all_txns = []
-    while True:
-        params = {"transaction_type": "ALL", "limit": limit, "offset": offset}
-        resp = requests.get(EBAY_API_URL, headers=headers, params=params)
-        if resp.status_code == 204:
-            break
-        if resp.status_code != 200:
-            raise RuntimeError(f"eBay getTransactions failed ({resp.status_code}): {resp.text}")
-        page = resp.json().get("transactions", [])
-        if not page:
-            break
-        all_txns.extend(page)
-        offset += limit
-
-    print(f"Fetched {len(all_txns)} transactions")
-
-    # 2) Group by orderId, but only keep the first value seen per type
-    orders = {}
-    for txn in all_txns:
-        oid = txn.get("orderId", "N/A")
-        grp = orders.setdefault(oid, {
-            "line_item_id":             None,
-            "sale_amount":              None,
-            "sale_date":                None,
-            "sale_final_fee":           None,
-            "sale_fixed_fee":           None,
-            "sale_intl_fee":            None,
-            "shipping_label_amount":    0.0,
-            "refund_amount":            None,
-            "refund_final_fee":         None,
-            "refund_fixed_fee":         None,
-            "dispute_amount":           None,
-            "credit_amount":            None,
-        })
 
-        ttype = txn.get("transactionType", "").upper()
-        date  = txn.get("transactionDate", "")
-        amt   = float(txn.get("amount", {}).get("value", 0.0))
-        li    = txn.get("orderLineItems", [{}])[0].get("lineItemId", None)
-        fees  = txn.get("orderLineItems", [{}])[0].get("marketplaceFees", [])
-
-        # SALE: capture *one* line_item_id, amount, date, and fees
-        if ttype == "SALE" and grp["sale_amount"] is None:
-            grp["line_item_id"]   = li
-            grp["sale_amount"]    = amt
-            grp["sale_date"]      = date
-            for f in fees:
-                ftype = f.get("feeType", "")
-                fval  = float(f.get("amount", {}).get("value", 0.0))
-                if   ftype == "FINAL_VALUE_FEE":
-                    grp["sale_final_fee"] = fval
-                elif ftype == "FINAL_VALUE_FEE_FIXED_PER_ORDER":
-                    grp["sale_fixed_fee"] = fval
-                elif ftype == "INTERNATIONAL_FEE":
-                    grp["sale_intl_fee"]  = fval
-
-        # SHIPPING_LABEL: sum them all
-        elif ttype == "SHIPPING_LABEL":
-            grp["shipping_label_amount"] += amt
-
-        # REFUND: capture *one* refund amount + fees
-        elif ttype == "REFUND" and grp["refund_amount"] is None:
-            grp["refund_amount"] = amt
-            for f in fees:
-                ftype = f.get("feeType", "")
-                fval  = float(f.get("amount", {}).get("value", 0.0))
-                if   ftype == "FINAL_VALUE_FEE":
-                    grp["refund_final_fee"] = fval
-                elif ftype == "FINAL_VALUE_FEE_FIXED_PER_ORDER":
-                    grp["refund_fixed_fee"] = fval
-
-        # DISPUTE: capture *one* dispute
-        elif ttype == "DISPUTE" and grp["dispute_amount"] is None:
-            grp["dispute_amount"] = amt
-
-        # CREDIT: capture *one* credit
-        elif ttype == "CREDIT" and grp["credit_amount"] is None:
-            grp["credit_amount"] = amt
-
-    # 3) Create (if needed) the grouped table with REAL for numeric columns
+def set_sync_state(cursor, seller_id, resource, high_water_mark):
     cursor.execute("""
-    CREATE TABLE IF NOT EXISTS transactions_grouped (
-        order_id                     TEXT    PRIMARY KEY,
-        line_item_id                 TEXT,
-        sale_amount                  REAL,
-        sale_transaction_date        TEXT,
-        sale_final_value_fee         REAL,
-        sale_fixed_final_value_fee   REAL,
-        sale_international_fee       REAL,
-        shipping_label_amount        REAL,
-        refund_amount                REAL,
-        refund_final_value_fee       REAL,
-        refund_fixed_final_value_fee REAL,
-        dispute_amount               REAL,
-        credit_amount                REAL
-    );
-    """)
-    cursor.execute("DELETE FROM transactions_grouped;")
+    INSERT INTO sync_state (seller_id, resource, high_water_mark, updated_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(seller_id, resource) DO UPDATE SET
+      high_water_mark = excluded.high_water_mark,
+      updated_at      = excluded.updated_at;
+    """, (seller_id, resource, high_water_mark, datetime.utcnow().isoformat()))
 
-    # 4) Insert one row per order
-    for oid, grp in orders.items():
-        cursor.execute("""
-        INSERT OR REPLACE INTO transactions_grouped (
-           order_id, line_item_id, sale_amount, sale_transaction_date,
-           sale_final_value_fee, sale_fixed_final_value_fee, sale_international_fee,
-           shipping_label_amount, refund_amount, refund_final_value_fee,
-           refund_fixed_final_value_fee, dispute_amount, credit_amount
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            oid,
-            grp["line_item_id"],
-            grp["sale_amount"],
-            grp["sale_date"],
-            grp["sale_final_fee"],
-            grp["sale_fixed_fee"],
-            grp["sale_intl_fee"],
-            grp["shipping_label_amount"],
-            grp["refund_amount"],
-            grp["refund_final_fee"],
-            grp["refund_fixed_fee"],
-            grp["dispute_amount"],
-            grp["credit_amount"],
-        ))
-    cursor.connection.commit()
-    print(f"Inserted {len(orders)} grouped orders into 'transactions_grouped'.")
 
+# Fetched transaction pages stored per batch of this many
+TRANSACTIONS_FLUSH_PAGES = 4
 
-def get_sold_list_data(cursor, access_token):
+
+def get_transactions_data(writer, job, access_token, seller_id="default", full_refresh=False):
     """
-    Retrieve sold items data from GetMyeBaySelling and insert the records into 
-    the 'sold_items' table (schema managed via schema.sq).
+    Retrieve transactions from the eBay Finances API, append them to the
+    raw table 'transactions' and regroup the orders they belong to in
+    'transactions_grouped' (see transactions_grouped.py).
+
+    The latest transactionDate ingested is kept in 'sync_state' per seller.
+    Later runs only ask for transactions since that mark (minus
+    TRANSACTIONS_SYNC_OVERLAP); events re-read in the overlap are already
+    stored and skipped. The first run, or full_refresh=True, reads the
+    whole history, which likewise only adds the events not stored yet.
+
+    Pages stream through fetch -> convert -> write: every
+    TRANSACTIONS_FLUSH_PAGES pages are turned into rows here while the
+    next pages download, and stored on the writer thread while the ones
+    after are converted, so memory is bounded by a few pages. Each batch
+    is committed on its own, so the write lock is never held across
+    network waits; stored events are idempotent, and the high-water mark
+    only moves once the whole fetch is in.
+
+    Returns the line item ids of the orders regrouped.
     """
-    EBAY_API_URL = "https://api.ebay.com/ws/api.dll"
-    # Retrieve eBay developer credentials from environment variables
-    EBAY_DEV_ID = os.environ.get("EBAY_DEV_ID")
-    EBAY_APP_ID = os.environ.get("EBAY_APP_ID")
-    EBAY_CERT_ID = os.environ.get("EBAY_CERT_ID")
-    
     headers = {
-        "X-EBAY-API-COMPATIBILITY-LEVEL": "967",
-        "X-EBAY-API-DEV-NAME": EBAY_DEV_ID,
-        "X-EBAY-API-APP-NAME": EBAY_APP_ID,
-        "X-EBAY-API-CERT-NAME": EBAY_CERT_ID,
-        "X-EBAY-API-CALL-NAME": "GetMyeBaySelling",
-        "X-EBAY-API-SITEID": "0",
-        "Content-Type": "text/xml"
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "X-EBAY-C-MARKETPLACE-ID": "EBAY_US",
     }
-    
-    XML_PAYLOAD = f"""<?xml version="1.0" encoding="utf-8"?>
+
+    job.begin("transactions")
+    high_water_mark = writer.call(start_transactions_store, seller_id)
+    if full_refresh:
+        high_water_mark = None
+    since = None
+    if high_water_mark:
+        since = transactions_cutoff(high_water_mark)
+
+    # 1) Stream all transactions (or only the window since the last sync);
+    #    pages after the first are fetched concurrently (EBAY_FETCH_WORKERS)
+    params = {"transaction_type": "ALL"}
+    if since:
+        params["filter"] = f"transactionDate:[{since}..]"
+    pages = iter_transaction_pages(headers, params,
+                                   on_page=lambda: job.page_fetched("transactions"),
+                                   on_body=lambda body: archive_payload("transactions", body))
+
+    n_txns = n_new = 0
+    flushing = None
+    for txns in batched_pages(pages, TRANSACTIONS_FLUSH_PAGES):
+        n_txns += len(txns)
+        # 2) Convert this batch while the writer stores the previous one
+        rows = [event_row(t) for t in txns]
+        dates = [t["transactionDate"] for t in txns if t.get("transactionDate")]
+        if dates and (high_water_mark is None or max(dates) > high_water_mark):
+            high_water_mark = max(dates)
+        if flushing is not None:
+            n_new += flushing.result()
+        flushing = writer.submit(store_event_batch, rows)
+    if flushing is not None:
+        n_new += flushing.result()
+
+    print(f"Fetched {n_txns} transactions" + (f" since {since}" if since else "")
+          + f", {n_new} of them new.")
+    line_items = writer.call(finish_transactions_store, seller_id, high_water_mark)
+    job.rows_stored("transactions", n_new)
+    job.end("transactions")
+    return line_items
+
+
+def batched_pages(pages, n):
+    """
+    Concatenate every n pages of transactions into one list.
+    """
+    batch = []
+    for i, page in enumerate(pages, 1):
+        batch.extend(page)
+        if i % n == 0:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def transactions_cutoff(high_water_mark):
+    """
+    Start of the overlap window the next incremental run re-reads.
+    """
+    return (datetime.strptime(high_water_mark, "%Y-%m-%dT%H:%M:%S.%fZ")
+            - TRANSACTIONS_SYNC_OVERLAP).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def start_transactions_store(cursor, seller_id):
+    """
+    Prepare the ingest of a transactions fetch (see store_event_batch and
+    finish_transactions_store).
+
+    Returns the seller's high-water mark, or None while 'transactions'
+    holds no events yet: a database whose grouped rows predate the raw
+    table has to read the whole history once to fill it.
+    """
+    high_water_mark = get_sync_state(cursor, seller_id, "transactions")
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM transactions)")
+    if not cursor.fetchone()[0]:
+        high_water_mark = None
+    cursor.connection.commit()
+    return high_water_mark
+
+
+def store_event_batch(cursor, rows):
+    """
+    Store one batch of 'transactions' rows in its own short transaction.
+    Returns the number of new events.
+    """
+    begin(cursor)
+    n_new = store_events(cursor, rows)
+    cursor.connection.commit()
+    return n_new
+
+
+def finish_transactions_store(cursor, seller_id, high_water_mark):
+    """
+    Regroup the orders that got new events, advance the seller's
+    high-water mark and commit.
+
+    Returns the line item ids of the regrouped orders.
+    """
+    # 3) Every batch was committed as it came, so events of a failed run
+    #    may already be stored; their orders stay marked dirty and are
+    #    regrouped by the next run.
+    begin(cursor)
+    line_items = refresh_transactions_grouped(cursor)
+    if high_water_mark:
+        set_sync_state(cursor, seller_id, "transactions", high_water_mark)
+    bump_data_version(cursor)
+    cursor.connection.commit()
+    return line_items
+
+
+def load_temp_keys(cursor, table, keys):
+    """
+    (Re)fill the one-column TEMP table `table` (key TEXT PRIMARY KEY) with
+    keys, for joining a set of ids against a real table.
+    """
+    cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY)")
+    cursor.execute(f"DELETE FROM temp.{table}")
+    cursor.executemany(f"INSERT OR IGNORE INTO temp.{table} VALUES (?)", ((k,) for k in keys))
+
+
+def upsert_sold_items(cursor, pages):
+    """
+    Upsert parsed SoldList pages (lists of row tuples) into 'sold_items' in
+    one transaction, one executemany per page
+    (manual fields such as item_cost and purchased_at are preserved).
+    """
+    begin(cursor)
+    for rows in pages:
+        cursor.executemany("""
+            INSERT INTO sold_items (
+              order_id, transaction_id, item_id, item_title, photo_url,
+              list_date, sold_date, time_to_sell, sku, quantity_sold,
+              sold_for_price, shipping_paid, final_fee, fixed_final_fee,
+              international_fee, cost_to_ship, refund_to_buyer,
+              refund_owed, refund_to_seller
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(order_id, transaction_id) DO UPDATE SET
+              item_id            = excluded.item_id,
+              item_title         = excluded.item_title,
+              photo_url          = excluded.photo_url,
+              list_date          = excluded.list_date,
+              sold_date          = excluded.sold_date,
+              time_to_sell       = excluded.time_to_sell,
+              sku                = excluded.sku,
+              quantity_sold      = excluded.quantity_sold,
+              sold_for_price     = excluded.sold_for_price,
+              shipping_paid      = excluded.shipping_paid,
+              final_fee          = excluded.final_fee,
+              fixed_final_fee    = excluded.fixed_final_fee,
+              international_fee  = excluded.international_fee,
+              cost_to_ship       = excluded.cost_to_ship,
+              refund_to_buyer    = excluded.refund_to_buyer,
+              refund_owed        = excluded.refund_owed,
+              refund_to_seller   = excluded.refund_to_seller;
+            """, rows)
+    bump_data_version(cursor)
+    cursor.connection.commit()
+
+
+def sold_list_request(access_token, page):
+    return f"""<?xml version="1.0" encoding="utf-8"?>
     <GetMyeBaySellingRequest xmlns="urn:ebay:apis:eBLBaseComponents">
         <DetailLevel>ReturnAll</DetailLevel>
         <RequesterCredentials>
@@ -446,7 +705,7 @@ def get_sold_list_data(cursor, access_token):
             <DurationInDays>60</DurationInDays>
             <Pagination>
                 <EntriesPerPage>200</EntriesPerPage>
-                <PageNumber>1</PageNumber>
+                <PageNumber>{page}</PageNumber>
             </Pagination>
         </SoldList>
         <OutputSelector>
@@ -455,40 +714,31 @@ def get_sold_list_data(cursor, access_token):
         .Item.PictureDetails.GalleryURL
         </OutputSelector>
     </GetMyeBaySellingRequest>"""
-    
-    response = requests.post(EBAY_API_URL, headers=headers, data=XML_PAYLOAD)
-    if response.status_code != 200:
-        print("Error retrieving sold list:", response.status_code, response.text)
-        return
-    soup = BeautifulSoup(response.text, "xml")
-    transactions = soup.find_all("Transaction")
-    
-    for transaction in transactions:
-        item = transaction.find("Item")
-        order_id = transaction.find("OrderLineItemID").text if transaction.find("OrderLineItemID") else "N/A"
-        transaction_id = transaction.find("TransactionID").text if transaction.find("TransactionID") else "N/A"
-        item_id = item.find("ItemID").text if item and item.find("ItemID") else "N/A"
-        item_title = item.find("Title").text if item and item.find("Title") else "N/A"
-        pic_url = None
-        pic_det = item.find("PictureDetails")
-        if pic_det:
-            gallery = pic_det.find("GalleryURL")
-            if gallery and gallery.text:
-                pic_url = gallery.text
-
-        photo_url = pic_url or "N/A"
-        list_date = item.find("StartTime").text if item and item.find("StartTime") else "N/A"
-        sold_date = item.find("EndTime").text if item and item.find("EndTime") else "N/A"
+
+
+def parse_sold_list_rows(content, meta=None):
+    """
+    Parse one SoldList page into 'sold_items' row tuples.
+    """
+    rows = []
+    for txn in parse_sold_transactions(content, meta):
+        order_id = txn.get("OrderLineItemID", "N/A")
+        transaction_id = txn.get("TransactionID", "N/A")
+        item_id = txn.get("ItemID", "N/A")
+        item_title = txn.get("Title", "N/A")
+        photo_url = txn.get("GalleryURL") or "N/A"
+        list_date = txn.get("StartTime", "N/A")
+        sold_date = txn.get("EndTime", "N/A")
         if list_date != "N/A" and sold_date != "N/A":
             list_dt = datetime.strptime(list_date, "%Y-%m-%dT%H:%M:%S.%fZ")
             sold_dt = datetime.strptime(sold_date, "%Y-%m-%dT%H:%M:%S.%fZ")
             time_to_sell = (sold_dt - list_dt).days
         else:
             time_to_sell = None
-        sku = item.find("SKU").text if item and item.find("SKU") else None
-        quant_sold = item.find("QuantitySold").text if item and item.find("QuantitySold") else None
-        sold_for_price = transaction.find("TransactionPrice").text if transaction.find("TransactionPrice") else None
-        shipping_paid = item.find("ShippingServiceCost").text if item and item.find("ShippingServiceCost") else None
+        sku = txn.get("SKU")
+        quant_sold = txn.get("QuantitySold")
+        sold_for_price = txn.get("TransactionPrice")
+        shipping_paid = txn.get("ShippingServiceCost")
         
         fixed_final_fee = None
         final_fee = None
@@ -498,87 +748,304 @@ def get_sold_list_data(cursor, access_token):
         refund_owed = None
         refund_to_seller = None
         
-        cursor.execute("""
-        INSERT INTO sold_items (
-          order_id, transaction_id, item_id, item_title, photo_url,
-          list_date, sold_date, time_to_sell, sku, quantity_sold,
-          sold_for_price, shipping_paid, final_fee, fixed_final_fee,
-          international_fee, cost_to_ship, refund_to_buyer,
-          refund_owed, refund_to_seller
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(order_id, transaction_id) DO UPDATE SET
-          item_id            = excluded.item_id,
-          item_title         = excluded.item_title,
-          photo_url          = excluded.photo_url,
-          list_date          = excluded.list_date,
-          sold_date          = excluded.sold_date,
-          time_to_sell       = excluded.time_to_sell,
-          sku                = excluded.sku,
-          quantity_sold      = excluded.quantity_sold,
-          sold_for_price     = excluded.sold_for_price,
-          shipping_paid      = excluded.shipping_paid,
-          final_fee          = excluded.final_fee,
-          fixed_final_fee    = excluded.fixed_final_fee,
-          international_fee  = excluded.international_fee,
-          cost_to_ship       = excluded.cost_to_ship,
-          refund_to_buyer    = excluded.refund_to_buyer,
-          refund_owed        = excluded.refund_owed,
-          refund_to_seller   = excluded.refund_to_seller;
-        """, (
+        rows.append((
           order_id, transaction_id, item_id, item_title, photo_url,
           list_date, sold_date, time_to_sell, sku, quant_sold,
           sold_for_price, shipping_paid, final_fee, fixed_final_fee,
           international_fee, cost_to_ship, refund_to_buyer,
           refund_owed, refund_to_seller
         ))
-    
+    return rows
+
+
+def get_sold_list_page(job, access_token, page):
+    """
+    Fetch and parse one SoldList page. Returns (rows, total_pages);
+    total_pages is None when the response doesn't say.
+    Raises if eBay still fails after the client's retries.
+    """
+    response = trading_post("GetMyeBaySelling", sold_list_request(access_token, page))
+    if response.status_code != 200:
+        raise RuntimeError(f"eBay GetMyeBaySelling SoldList page {page} failed "
+                           f"({response.status_code}): {response.text}")
+    job.page_fetched("sold_list")
+    archive_payload("sold_list", response.content)
+    meta = {}
+    rows = parse_sold_list_rows(response.content, meta)
+    total_pages = meta.get("TotalNumberOfPages")
+    return rows, int(total_pages) if total_pages else None
+
+
+def get_sold_list_data(writer, job, access_token):
+    """
+    Retrieve sold items data from GetMyeBaySelling and insert the records into 
+    the 'sold_items' table (schema managed via schema.sq).
+    Every page of the 60-day SoldList is read: page 1 gives the page
+    count, the rest are fetched concurrently.
+    Returns the transaction ids (fee line item ids) of the rows written.
+    """
+    job.begin("sold_list")
+    rows, total_pages = get_sold_list_page(job, access_token, 1)
+    pages = [rows]
+    if total_pages:
+        with ThreadPoolExecutor(max_workers=fetch_workers()) as pool:
+            for page_rows, _ in pool.map(lambda p: get_sold_list_page(job, access_token, p),
+                                         range(2, total_pages + 1)):
+                pages.append(page_rows)
+    elif rows:
+        # No pagination info in the response: walk until a page comes back empty
+        page = 2
+        while True:
+            page_rows, _ = get_sold_list_page(job, access_token, page)
+            if not page_rows:
+                break
+            pages.append(page_rows)
+            page += 1
+
+    writer.call(upsert_sold_items, pages)
+    total = sum(len(page_rows) for page_rows in pages)
+    job.rows_stored("sold_list", total)
+    job.end("sold_list")
+    print(f"Upserted {total} sold items (manual fields preserved).")
+    return {row[1] for page_rows in pages for row in page_rows}
+
+
+# Sold-history backfill walks GetOrders in fixed windows aligned to the
+# epoch, so the same windows come back on every run and can be checkpointed.
+BACKFILL_WINDOW_DAYS = 30
+BACKFILL_EPOCH = datetime(2000, 1, 1)
+
+# GetOrders only returns orders created in the last 90 days; windows
+# further back can't return anything.
+BACKFILL_MAX_DAYS = 90
+
+
+def backfill_windows(days, now=None):
+    """
+    (start, end) datetimes of the aligned windows covering the last `days`.
+    """
+    now = now or datetime.utcnow()
+    step = timedelta(days=BACKFILL_WINDOW_DAYS)
+    first = (now - timedelta(days=days) - BACKFILL_EPOCH) // step
+    last = (now - BACKFILL_EPOCH) // step
+    return [(BACKFILL_EPOCH + k * step, BACKFILL_EPOCH + (k + 1) * step)
+            for k in range(first, last + 1)]
+
+
+def orders_request(access_token, start, end, page):
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+    <GetOrdersRequest xmlns="urn:ebay:apis:eBLBaseComponents">
+        <RequesterCredentials>
+            <eBayAuthToken>{access_token}</eBayAuthToken>
+        </RequesterCredentials>
+        <CreateTimeFrom>{start.strftime('%Y-%m-%dT%H:%M:%S.000Z')}</CreateTimeFrom>
+        <CreateTimeTo>{end.strftime('%Y-%m-%dT%H:%M:%S.000Z')}</CreateTimeTo>
+        <Pagination>
+            <EntriesPerPage>100</EntriesPerPage>
+            <PageNumber>{page}</PageNumber>
+        </Pagination>
+        <OrderRole>Seller</OrderRole>
+        <OrderStatus>All</OrderStatus>
+    </GetOrdersRequest>"""
+
+
+def parse_order_rows(content, meta=None):
+    """
+    Parse one GetOrders page into partial 'sold_items' rows (see
+    merge_order_rows).
+    """
+    return [(
+        txn.get("OrderLineItemID", "N/A"),
+        txn.get("TransactionID", "N/A"),
+        txn.get("ItemID"),
+        txn.get("Title"),
+        txn.get("CreatedDate"),
+        txn.get("SKU"),
+        txn.get("QuantityPurchased"),
+        txn.get("TransactionPrice"),
+        txn.get("ActualShippingCost"),
+    ) for txn in parse_order_transactions(content, meta)]
+
+
+def get_order_window(job, access_token, start, end):
+    """
+    Fetch every GetOrders page for orders created in [start, end) and
+    return them as partial 'sold_items' rows.
+    """
+    rows = []
+    page = 1
+    while True:
+        resp = trading_post("GetOrders", orders_request(access_token, start, end, page))
+        if resp.status_code != 200:
+            raise RuntimeError(f"eBay GetOrders failed ({resp.status_code}): {resp.text}")
+        job.page_fetched("backfill")
+        archive_payload("orders", resp.content)
+        meta = {}
+        rows.extend(parse_order_rows(resp.content, meta))
+        if meta.get("Ack") == "Failure":
+            raise RuntimeError(f"eBay GetOrders failed for window {start:%Y-%m-%d}..{end:%Y-%m-%d}")
+        total_pages = int(meta.get("TotalNumberOfPages") or 1)
+        if page >= total_pages or meta.get("HasMoreOrders") == "false":
+            break
+        page += 1
+    return rows
+
+
+def get_done_windows(cursor, seller_id):
+    cursor.execute("SELECT window_start FROM backfill_windows WHERE seller_id=?", (seller_id,))
+    return {row[0] for row in cursor.fetchall()}
+
+
+# Columns a GetOrders row fills in 'sold_items', after the key
+ORDER_COLUMNS = ("item_id", "item_title", "sold_date", "sku", "quantity_sold",
+                 "sold_for_price", "shipping_paid")
+
+
+def merge_order_rows(cursor, rows, overwrite=False):
+    """
+    Merge GetOrders rows into 'sold_items'. Values already present (from
+    the richer SoldList data or manual edits) are kept; with
+    overwrite=True (reprocess.py) the rows' own non-null values replace
+    them instead.
+    """
+    keep = "excluded.{0}, sold_items.{0}" if overwrite else "sold_items.{0}, excluded.{0}"
+    updates = ",\n          ".join(f"{c} = COALESCE({keep.format(c)})" for c in ORDER_COLUMNS)
+    cursor.executemany(f"""
+        INSERT INTO sold_items (
+          order_id, transaction_id, {', '.join(ORDER_COLUMNS)}
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(order_id, transaction_id) DO UPDATE SET
+          {updates};
+        """, rows)
+
+
+def store_order_window(cursor, seller_id, start, end, rows, complete):
+    """
+    Merge one window of GetOrders rows into 'sold_items' and, if complete
+    (the window is entirely in the past and returned orders), checkpoint
+    it.
+    """
+    begin(cursor)
+    merge_order_rows(cursor, rows)
+    if complete:
+        cursor.execute("""
+        INSERT OR REPLACE INTO backfill_windows
+          (seller_id, window_start, window_end, orders, completed_at)
+        VALUES (?, ?, ?, ?, ?)
+        """, (seller_id, start.isoformat(), end.isoformat(), len(rows),
+              datetime.utcnow().isoformat()))
+    bump_data_version(cursor)
     cursor.connection.commit()
-    print("Sold items data upserted (manual fields preserved).")
 
-def update_sold_data(cursor):
+
+def get_sold_history(writer, job, access_token, seller_id, days):
+    """
+    Backfill 'sold_items' beyond the 60-day / 200-entry SoldList window.
+    History (at most BACKFILL_MAX_DAYS, all GetOrders retains) is split
+    into BACKFILL_WINDOW_DAYS windows of GetOrders calls, fetched
+    concurrently; each finished window is written and checkpointed in
+    'backfill_windows', so an interrupted import resumes where it left off.
+
+    A window that fails is reported and skipped, not checkpointed, and the
+    other windows carry on; windows that come back empty aren't
+    checkpointed either, since re-asking costs one call.
+    Returns (transaction ids of the rows written, failed windows as
+    "YYYY-MM-DD..YYYY-MM-DD" strings).
     """
-    Update sold items data with financial details from transactions_grouped.
+    job.begin("backfill")
+    now = datetime.utcnow()
+    days = min(days, BACKFILL_MAX_DAYS)
+    done = writer.call(get_done_windows, seller_id)
+    todo = [(start, end) for start, end in backfill_windows(days, now)
+            if start.isoformat() not in done]
+    print(f"Backfilling {len(todo)} windows of {BACKFILL_WINDOW_DAYS} days "
+          f"({len(done)} already checkpointed).")
+    line_items = set()
+    failed = []
+
+    # The oldest window starts before what GetOrders accepts; ask from there
+    oldest = now - timedelta(days=BACKFILL_MAX_DAYS) + timedelta(minutes=5)
+
+    with ThreadPoolExecutor(max_workers=fetch_workers()) as pool:
+        futures = {
+            pool.submit(get_order_window, job, access_token, max(start, oldest), end): (start, end)
+            for start, end in todo
+        }
+        for future in as_completed(futures):
+            start, end = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                print(f"Backfill window {start:%Y-%m-%d}..{end:%Y-%m-%d} failed: {e}")
+                failed.append(f"{start:%Y-%m-%d}..{end:%Y-%m-%d}")
+                continue
+            writer.call(store_order_window, seller_id, start, end, rows, end <= now and bool(rows))
+            job.rows_stored("backfill", len(rows))
+            line_items.update(row[1] for row in rows)
+    job.end("backfill")
+    return line_items, sorted(failed)
+
+
+def run_backfill(job, access_token, seller_id, days):
+    """
+    Background job body for POST /api/sync/backfill.
+    """
+    start = time.perf_counter()
+    writer = SerialWriter(db_path)
+    try:
+        job.set_phase("backfilling")
+        line_items, failed = get_sold_history(writer, job, access_token, seller_id, days)
+        job.set_phase("applying fees")
+        writer.call(update_sold_data, line_items)
+        job.set_phase("updating metrics")
+        writer.call(refresh_sold_metrics)
+        job.set_phase("updating daily stats")
+        writer.call(refresh_daily_stats)
+        writer.commit()
+        prune_archive()
+        print(f"Backfill completed in {time.perf_counter() - start:.2f} seconds.")
+        if failed:
+            # The windows that did load are kept; running the backfill
+            # again only fetches the failed ones
+            raise RuntimeError(f"{len(failed)} backfill windows failed and will be retried "
+                               f"on the next run: {', '.join(failed)}")
+    except Exception:
+        writer.rollback()
+        raise
+    finally:
+        writer.close()
+
+
+def update_sold_data(cursor, line_items=None):
+    """
+    Update sold items data with financial details from transactions_grouped,
+    in one pass that joins each sold row to its order once.
+
+    line_items: only update sold items with these transaction ids (the fee
+    line item ids changed by the current sync); None updates every row.
     """
-    update_query = '''
+    only = ""
+    if line_items is not None:
+        if not line_items:
+            print("Sold items updated with financial data from transactions_grouped (nothing changed).")
+            return
+        load_temp_keys(cursor, "changed_line_items", line_items)
+        # IN on the indexed transaction_id: only the changed rows are visited
+        only = "AND sold_items.transaction_id IN temp.changed_line_items"
+    cursor.execute(f"""
     UPDATE sold_items
     SET
-        final_fee = (
-            SELECT tg.sale_final_value_fee
-            FROM transactions_grouped AS tg
-            WHERE tg.line_item_id = sold_items.transaction_id
-        ),
-        fixed_final_fee = (
-            SELECT tg.sale_fixed_final_value_fee
-            FROM transactions_grouped AS tg
-            WHERE tg.line_item_id = sold_items.transaction_id
-        ),
-        international_fee = (
-            SELECT tg.sale_international_fee
-            FROM transactions_grouped AS tg
-            WHERE tg.line_item_id = sold_items.transaction_id
-        ),
-        cost_to_ship = (
-            SELECT tg.shipping_label_amount
-            FROM transactions_grouped AS tg
-            WHERE tg.line_item_id = sold_items.transaction_id
-        ),
-        refund_owed = (
-            SELECT tg.refund_amount
-            FROM transactions_grouped AS tg
-            WHERE tg.line_item_id = sold_items.transaction_id
-        ),
-        refund_to_seller = (
-            SELECT (tg.refund_final_value_fee + tg.refund_fixed_final_value_fee)
-            FROM transactions_grouped AS tg
-            WHERE tg.line_item_id = sold_items.transaction_id
-        )
-    WHERE EXISTS (
-        SELECT 1
-        FROM transactions_grouped AS tg
-        WHERE tg.line_item_id = sold_items.transaction_id
-    );
-    '''
-    cursor.execute(update_query)
+        final_fee         = tg.sale_final_value_fee,
+        fixed_final_fee   = tg.sale_fixed_final_value_fee,
+        international_fee = tg.sale_international_fee,
+        cost_to_ship      = tg.shipping_label_amount,
+        refund_owed       = tg.refund_amount,
+        refund_to_seller  = tg.refund_final_value_fee + tg.refund_fixed_final_value_fee
+    FROM transactions_grouped AS tg
+    WHERE tg.line_item_id = sold_items.transaction_id
+    {only};
+    """)
+    bump_data_version(cursor)
     cursor.connection.commit()
     print("Sold items updated with financial data from transactions_grouped.")
 
@@ -587,138 +1054,377 @@ def update_sold_data(cursor):
 # New Route to Update eBay Data   #
 ###################################
 
+def run_sync(job, access_token, seller_id, full_refresh=False):
+    """
+    Run one full eBay sync, reporting progress into job (a SyncJob).
+    Raises on failure after rolling back the uncommitted writes.
+    """
+    start = time.perf_counter()
+    stats_before = connection_stats()
+    # One thread owns the SQLite connection; the fetch phases hand it rows
+    writer = SerialWriter(db_path)
+    try:
+        # The three fetch phases are independent network I/O, so run them
+        # side by side; only update_sold_data needs all of them finished.
+        job.set_phase("fetching")
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            phases = [
+                pool.submit(get_transactions_data, writer, job, access_token, seller_id, full_refresh),
+                pool.submit(get_sold_list_data, writer, job, access_token),
+                pool.submit(get_inventory_data, writer, job, access_token),
+            ]
+            txn_line_items, sold_line_items, _ = [phase.result() for phase in phases]
+        # Only rows touched by this sync need their fees re-applied
+        line_items = txn_line_items | sold_line_items
+        job.set_phase("applying fees")
+        writer.call(update_sold_data, line_items)
+        # net_return / roi / net_profit_margin of every row whose price,
+        # fees or cost this sync changed
+        job.set_phase("updating metrics")
+        writer.call(refresh_sold_metrics)
+        job.set_phase("updating daily stats")
+        writer.call(refresh_daily_stats)
+
+        elapsed = time.perf_counter() - start
+        stats = connection_stats()
+        n_requests = stats["requests"] - stats_before["requests"]
+        n_connections = stats["connections"] - stats_before["connections"]
+        print(f"Data update completed in {elapsed:.2f} seconds "
+              f"({n_requests} eBay requests over {n_connections} new connections).")
+        writer.commit()
+        prune_archive()
+    except Exception:
+        writer.rollback()
+        raise
+    finally:
+        writer.close()
+
+
+def sync_params():
+    """
+    Resolve (access_token, seller_id, full_refresh) for a sync started from
+    the current request. access_token is None if the user isn't logged in.
+    """
+    access_token = session.get("access_token")
+    if not access_token:
+        return None, None, False
+    seller_id = session.get("seller_id") or get_seller_id(access_token) or "default"
+    session["seller_id"] = seller_id
+    # ?full=1 ignores the stored high-water mark and re-reads the whole
+    # Finances history; only events not stored yet are added (and their
+    # orders regrouped), nothing is deleted or rebuilt
+    full_refresh = request.args.get("full") == "1"
+    return access_token, seller_id, full_refresh
+
+
 @app.route('/update-ebay-data')
 def update_ebay_data():
+    """
+    Start an eBay sync through sync_runner, like POST /api/sync, so it
+    can't overlap a sync job already in flight for this seller (that job
+    is returned instead). Poll it through GET /api/sync/<job_id>.
+    """
     # Check if the user is authenticated (i.e. has an access token in session)
-    access_token = session.get("access_token")
+    access_token, seller_id, full_refresh = sync_params()
     if not access_token:
         return redirect(url_for("ebay_login"))
-    
-    try:
-        start = time.perf_counter()
-        # Open a connection to the SQLite database (change the path if needed)
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Call helper functions to update the database
-        get_transactions_data(cursor, access_token)
-        get_sold_list_data(cursor, access_token)
-        get_inventory_data(cursor, access_token)
-        update_sold_data(cursor)
-        
-        elapsed = time.perf_counter() - start
-        print(f"Data update completed in {elapsed:.2f} seconds.")
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        return jsonify({"error": str(e)}), 500
-    finally:
-        conn.close()
-    
-    return jsonify({"status": "eBay data updated successfully"})
+
+    job, attached = sync_runner.start(seller_id, run_sync, access_token, seller_id, full_refresh)
+    return job_response(job, attached)
+
+
+def job_response(job, attached):
+    """
+    202 response describing a started (or attached-to) sync job.
+    """
+    body = job.to_dict()
+    body["attached"] = attached
+    return jsonify(body), 202, {"Location": url_for("api_sync_status", job_id=job.id)}
+
+
+@app.route('/api/sync', methods=['POST'])
+def api_start_sync():
+    """
+    Start an eBay sync in the background and return its job id right away.
+    If this seller already has a sync in flight, that job is returned.
+    """
+    access_token, seller_id, full_refresh = sync_params()
+    if not access_token:
+        return jsonify({"error": "Not logged in with eBay"}), 401
+
+    job, attached = sync_runner.start(seller_id, run_sync, access_token, seller_id, full_refresh)
+    return job_response(job, attached)
+
+
+@app.route('/api/sync/backfill', methods=['POST'])
+def api_start_backfill():
+    """
+    Start a sold-history backfill (?days=, default and at most
+    BACKFILL_MAX_DAYS) in the background. Poll it through
+    GET /api/sync/<job_id>.
+    """
+    access_token, seller_id, _ = sync_params()
+    if not access_token:
+        return jsonify({"error": "Not logged in with eBay"}), 401
+    days = request.args.get("days", default=BACKFILL_MAX_DAYS, type=int)
+
+    job, attached = sync_runner.start(seller_id, run_backfill, access_token, seller_id, days,
+                                      kind="backfill")
+    return job_response(job, attached)
+
+
+@app.route('/api/sync/<job_id>')
+def api_sync_status(job_id):
+    job = sync_runner.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown sync job"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/ebay-budget')
+def api_ebay_budget():
+    """
+    Today's eBay call usage per API and counters per call name.
+    """
+    return jsonify(budget.report())
+
+def stream_rows(batches, shape):
+    """
+    Streamed response of row batches (see streaming.py): one JSON object
+    per line for shape "ndjson", else a JSON array. The body is sent after
+    the request's app context is torn down, so the response takes the
+    connection over from get_db() and returns it to the pool once closed.
+    """
+    conn = g.pop("db", None)
+    if shape == "ndjson":
+        response = app.response_class(ndjson(batches), mimetype=NDJSON_MIMETYPE)
+    else:
+        response = app.response_class(json_array(batches), mimetype="application/json")
+    if conn is not None:
+        response.call_on_close(lambda: db_pool.release(conn))
+    return response
+
 
 @app.route('/api/transactions')
+@conditional
 def api_transactions():
+    """
+    Every transaction row, streamed as it is read: a JSON array, or with
+    ?format=ndjson one JSON object per line.
+    """
+    shape = request.args.get("format") or "json"
+    if shape not in ("json", "ndjson"):
+        return jsonify({"error": "format must be json or ndjson"}), 400
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         cursor.execute("SELECT * FROM transactions")
-        rows = cursor.fetchall()
-        # Optionally, convert rows to a list of dictionaries for JSON serialization.
-        columns = [column[0] for column in cursor.description]
-        data = [dict(zip(columns, row)) for row in rows]
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        conn.close()
-    return jsonify(data)
+    return stream_rows(iter_batches(cursor), shape)
 
 @app.route('/api/sold-items')
+@conditional
 def api_sold_items():
+    """
+    One page of sold items, newest first by default. Query parameters:
+    sort (sold_date | sold_for_price | net_return), order (asc | desc),
+    limit, cursor (next_cursor of the previous page), start_date /
+    end_date, sku, purchased_at, q (title search), fields (comma-separated
+    columns to return) and format (rows | columns | ndjson).
+    Returns {"items": [...], "next_cursor": token or null}, or with
+    format=columns {"columns": {name: [values]}, "next_cursor": ...}.
+    format=ndjson instead streams every matching row, one JSON object per
+    line, for exports.
+    """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM sold_items ORDER BY sold_date DESC")
-        rows = cursor.fetchall()
-        columns = [column[0] for column in cursor.description]
-        data = [dict(zip(columns, row)) for row in rows]
+        cursor = get_db().cursor()
+        if request.args.get("format") == "ndjson":
+            return stream_rows(export_batches(cursor, SOLD_ITEMS, request.args), "ndjson")
+        return jsonify(list_page(cursor, SOLD_ITEMS, request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        conn.close()
-    return jsonify(data)
 
 @app.route('/api/inventory-items')
+@conditional
 def api_inventory_items():
+    """
+    One page of inventory items; same parameters as /api/sold-items, with
+    sort = list_date | list_price | item_cost.
+    """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        # Pull all inventory rows, you can add an ORDER BY if you like
-        cursor.execute("SELECT * FROM inventory_items ORDER BY list_date DESC")
-        rows = cursor.fetchall()
-        # Grab the column names for dict-wrapping
-        columns = [column[0] for column in cursor.description]
-        data = [dict(zip(columns, row)) for row in rows]
+        cursor = get_db().cursor()
+        if request.args.get("format") == "ndjson":
+            return stream_rows(export_batches(cursor, INVENTORY_ITEMS, request.args), "ndjson")
+        return jsonify(list_page(cursor, INVENTORY_ITEMS, request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        conn.close()
-    return jsonify(data)
+
+
+# Columns the sold / inventory tables let the user edit.
+# net_return / roi / net_profit_margin follow from item_cost on the server
+# (see sold_metrics.py) and are returned for the page to show.
+SOLD_EDITABLE_FIELDS = {"item_cost", "purchased_at"}
+INVENTORY_EDITABLE_FIELDS = {"item_cost", "purchased_at", "sku", "storage_location"}
+
+# Most row updates one bulk PATCH may carry
+MAX_BULK_UPDATES = 1000
+
+
+def _cost(value):
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and value >= 0)
+
+
+# Editable field -> (check of a non-null value, what the error says it must be)
+FIELD_CHECKS = {
+    "item_cost":        (_cost, "a number of at least 0"),
+    "purchased_at":     (lambda value: isinstance(value, str), "a string"),
+    "sku":              (lambda value: isinstance(value, str), "a string"),
+    "storage_location": (lambda value: isinstance(value, str), "a string"),
+}
+
+
+def apply_row_updates(cursor, table, key, allowed_fields, updates):
+    """
+    Apply updates (dicts of a `key` value and the fields to set on that
+    row) to table in one transaction, one executemany per distinct set of
+    fields. Fields outside allowed_fields are ignored.
+    Raises ValueError, before writing anything, for an update without a
+    key or without any allowed field, or with a value FIELD_CHECKS rejects
+    (null clears a field). Returns the number of rows changed; the caller
+    commits.
+    """
+    groups = {}
+    for i, update in enumerate(updates):
+        if not isinstance(update, dict) or update.get(key) in (None, ""):
+            raise ValueError(f"Update {i} has no {key}")
+        if not isinstance(update[key], (str, int)) or isinstance(update[key], bool):
+            raise ValueError(f"Update {i}: {key} must be a string or number")
+        fields = tuple(sorted(f for f in update if f in allowed_fields))
+        if not fields:
+            raise ValueError(f"Update {i} has no valid fields to update")
+        for field in fields:
+            check, expected = FIELD_CHECKS[field]
+            if update[field] is not None and not check(update[field]):
+                raise ValueError(f"Update {i} ({update[key]}): {field} must be {expected} or null")
+        groups.setdefault(fields, []).append([update[f] for f in fields] + [update[key]])
+
+    begin(cursor)
+    n_rows = 0
+    for fields, values in groups.items():
+        set_clause = ", ".join(f"{field}=?" for field in fields)
+        cursor.executemany(f"UPDATE {table} SET {set_clause} WHERE {key}=?", values)
+        n_rows += cursor.rowcount
+    bump_data_version(cursor)
+    return n_rows
+
+
+def bulk_updates():
+    """
+    The update list of a bulk PATCH body: a JSON array, or an object with
+    an "updates" array. Raises ValueError for anything else.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("updates")
+    if not isinstance(data, list) or not data:
+        raise ValueError("Expected a non-empty JSON array of updates")
+    if len(data) > MAX_BULK_UPDATES:
+        raise ValueError(f"At most {MAX_BULK_UPDATES} updates per request")
+    return data
+
+
+def sold_metrics_rows(cursor, order_ids):
+    """
+    The recomputed metrics of the sold items of order_ids, for the page.
+    """
+    load_temp_keys(cursor, "patched_orders", order_ids)
+    cursor.execute("""
+    SELECT order_id, transaction_id, net_return, roi, net_profit_margin
+    FROM sold_items WHERE order_id IN temp.patched_orders
+    """)
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
 
 
 @app.route('/api/sold-items/<order_id>', methods=['PATCH'])
 def update_sold_item(order_id):
-    data = request.get_json() or {}
-    allowed_fields = {
-        "item_cost", "purchased_at", "net_return", "roi", "net_profit_margin"
-        # add any other fields you want editable
-    }
-    updates = {k: data[k] for k in data if k in allowed_fields}
+    data = request.get_json(silent=True)
+    data = data if isinstance(data, dict) else {}
+    updates = {k: data[k] for k in data if k in SOLD_EDITABLE_FIELDS}
     if not updates:
         return jsonify({"error": "No valid fields to update"}), 400
 
-    set_clause = ", ".join(f"{field}=?" for field in updates)
-    values = list(updates.values()) + [order_id]
+    cursor = get_db().cursor()
+    try:
+        apply_row_updates(cursor, "sold_items", "order_id", SOLD_EDITABLE_FIELDS,
+                          [dict(updates, order_id=order_id)])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    refresh_sold_metrics(cursor)
+    refresh_daily_stats(cursor)
+    return jsonify({"status": "updated", "items": sold_metrics_rows(cursor, [order_id])})
+
+
+@app.route('/api/sold-items', methods=['PATCH'])
+def update_sold_items():
+    """
+    Bulk edit: [{"order_id": ..., "item_cost": ..., ...}, ...], applied in
+    one transaction (all or nothing). Returns the recomputed metrics of
+    every sold item of those orders.
+    """
+    try:
+        updates = bulk_updates()
+        cursor = get_db().cursor()
+        n_rows = apply_row_updates(cursor, "sold_items", "order_id", SOLD_EDITABLE_FIELDS, updates)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    refresh_sold_metrics(cursor)
+    refresh_daily_stats(cursor)
+    items = sold_metrics_rows(cursor, {u["order_id"] for u in updates})
+    return jsonify({"status": "updated", "updated": n_rows, "items": items})
 
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute(
-        f"UPDATE sold_items SET {set_clause} WHERE order_id=?",
-        values
-    )
-    conn.commit()
-    conn.close()
-    return jsonify({"status": "updated"})
 
 @app.route('/api/inventory-items/<item_id>', methods=['PATCH'])
 def update_inventory_item(item_id):
-    data = request.get_json() or {}
-    allowed_fields = {
-        "item_cost",
-        "purchased_at",
-        "sku",
-        "storage_location"
-    }
+    data = request.get_json(silent=True)
+    data = data if isinstance(data, dict) else {}
     # Only keep keys we allow
-    updates = {k: data[k] for k in data if k in allowed_fields}
+    updates = {k: data[k] for k in data if k in INVENTORY_EDITABLE_FIELDS}
     if not updates:
         return jsonify({"error": "No valid fields to update"}), 400
 
-    # Build the SET clause and values array
-    set_clause = ", ".join(f"{field}=?" for field in updates)
-    values = list(updates.values()) + [item_id]
-
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute(
-        f"UPDATE inventory_items SET {set_clause} WHERE item_id=?",
-        values
-    )
-    conn.commit()
-    conn.close()
+    cursor = get_db().cursor()
+    try:
+        apply_row_updates(cursor, "inventory_items", "item_id", INVENTORY_EDITABLE_FIELDS,
+                          [dict(updates, item_id=item_id)])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    refresh_daily_stats(cursor)
     return jsonify({"status": "updated"})
 
+
+@app.route('/api/inventory-items', methods=['PATCH'])
+def update_inventory_items():
+    """
+    Bulk edit: [{"item_id": ..., "storage_location": ..., ...}, ...],
+    applied in one transaction (all or nothing).
+    """
+    try:
+        updates = bulk_updates()
+        cursor = get_db().cursor()
+        n_rows = apply_row_updates(cursor, "inventory_items", "item_id", INVENTORY_EDITABLE_FIELDS, updates)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    refresh_daily_stats(cursor)
+    return jsonify({"status": "updated", "updated": n_rows})
+
 @app.route('/api/insights-data')
+@conditional
 def api_insights_data():
     """
     Return JSON: {
@@ -746,97 +1452,61 @@ def api_insights_data():
     if not start:
         start = (datetime.fromisoformat(end) - timedelta(days=30)).date().isoformat()
 
-    conn = sqlite3.connect(db_path)
-    cur  = conn.cursor()
+    # Served from daily_stats as it stands: syncs and edits refresh it as
+    # they write (see schedule_refresh for writes made elsewhere)
+    cur  = get_db().cursor()
+    version = get_data_version(cur)
+    return jsonify(insights_cache.get(
+        version, ("insights", start, end), lambda: insights_summary(cur, start, end)))
 
-    # 1) Daily sales aggregates
+
+def insights_summary(cur, start, end):
+    """
+    Body of /api/insights-data for one date range: the daily sales rows and
+    the range totals, from a single scan of daily_stats (the totals ride
+    along on every row as window aggregates).
+    """
     cur.execute("""
       SELECT
-        substr(sold_date,1,10) AS day,
-        COUNT(*)               AS count,
-        SUM(sold_for_price)    AS gross,
-        SUM(net_return)        AS net
-      FROM sold_items
+        day, sales_count, gross, net,
+        SUM(gross)              OVER () AS total_gross,
+        SUM(net)                OVER () AS total_net,
+        SUM(sales_count)        OVER () AS total_count,
+        SUM(npm_sum) OVER () * 100.0 / NULLIF(SUM(npm_count) OVER (), 0) AS avg_npm,
+        SUM(spent_inventory)    OVER () AS spent_inventory,
+        SUM(cost_of_goods_sold) OVER () AS cost_of_goods_sold,
+        SUM(marketplace_fees)   OVER () AS marketplace_fees,
+        SUM(shipping_labels)    OVER () AS shipping_labels
+      FROM daily_stats
       WHERE day BETWEEN ? AND ?
-      GROUP BY day
       ORDER BY day;
     """, (start, end))
     rows = cur.fetchall()
+    totals = rows[0][4:] if rows else (None,) * 8
+    (total_gross, total_net, total_count, avg_npm, spent_inventory,
+     cost_of_goods_sold, marketplace_fees, shipping_labels) = totals
 
-    # 2) Overall sales summary
-    cur.execute("""
-      SELECT
-        SUM(sold_for_price)                     AS total_gross,
-        SUM(net_return)                         AS total_net,
-        COUNT(*)                                AS total_count,
-        AVG(net_return * 1.0 / sold_for_price) * 100 AS avg_npm
-      FROM sold_items
-      WHERE substr(sold_date,1,10) BETWEEN ? AND ?
-    """, (start, end))
-    total_gross, total_net, total_count, avg_npm = cur.fetchone()
-
-    # 3) Spent on new inventory
-    cur.execute("""
-      SELECT
-        SUM(item_cost) AS spent_inventory
-      FROM inventory_items
-      WHERE substr(list_date,1,10) BETWEEN ? AND ?
-    """, (start, end))
-    spent_inventory = cur.fetchone()[0] or 0.0
-
-    # 4) Cost of goods sold
-    cur.execute("""
-      SELECT
-        SUM(item_cost) AS cost_of_goods_sold
-      FROM sold_items
-      WHERE substr(sold_date,1,10) BETWEEN ? AND ?
-    """, (start, end))
-    cost_of_goods_sold = cur.fetchone()[0] or 0.0
-
-    # 5) Marketplace fees (final + fixed + international)
-    cur.execute("""
-      SELECT
-        SUM(
-            COALESCE(final_fee,0)
-            + COALESCE(fixed_final_fee,0)
-            + COALESCE(international_fee,0)
-            ) AS marketplace_fees
-      FROM sold_items
-      WHERE substr(sold_date,1,10) BETWEEN ? AND ?
-    """, (start, end))
-    marketplace_fees = cur.fetchone()[0] or 0.0
-
-    # 6) Shipping labels cost
-    cur.execute("""
-      SELECT
-        SUM(cost_to_ship) AS shipping_labels
-      FROM sold_items
-      WHERE substr(sold_date,1,10) BETWEEN ? AND ?
-    """, (start, end))
-    shipping_labels = cur.fetchone()[0] or 0.0
-
-    conn.close()
-
-    # Build response
+    # Build response; days with only new listings aren't sales data points
     data = [
         {"date": r[0], "count": r[1], "gross": r[2] or 0.0, "net": r[3] or 0.0}
-        for r in rows
+        for r in rows if r[1] > 0
     ]
     summary = {
         "total_gross":        total_gross       or 0.0,
         "total_net":          total_net         or 0.0,
         "total_count":        total_count       or 0,
         "avg_npm":            avg_npm           or 0.0,
-        "spent_inventory":    spent_inventory,
-        "cost_of_goods_sold": cost_of_goods_sold,
-        "marketplace_fees":   marketplace_fees,
-        "shipping_labels":    shipping_labels
+        "spent_inventory":    spent_inventory    or 0.0,
+        "cost_of_goods_sold": cost_of_goods_sold or 0.0,
+        "marketplace_fees":   marketplace_fees   or 0.0,
+        "shipping_labels":    shipping_labels    or 0.0
     }
 
-    return jsonify({"data": data, "summary": summary})
+    return {"data": data, "summary": summary}
 
 
 @app.route('/api/insights-activity-data')
+@conditional
 def api_insights_activity_data():
     # 1) Parse & default date range
     start = request.args.get("start_date")
@@ -846,34 +1516,29 @@ def api_insights_activity_data():
     if not start:
         start = (datetime.fromisoformat(end) - timedelta(days=30)).date().isoformat()
 
-    conn = sqlite3.connect(db_path)
-    cur  = conn.cursor()
+    cur  = get_db().cursor()
+    version = get_data_version(cur)
+    return jsonify(insights_cache.get(
+        version, ("activity", start, end), lambda: activity_by_day(cur, start, end)))
 
-    # 2) Daily sales counts
-    cur.execute("""
-      SELECT
-        substr(sold_date,1,10) AS day,
-        COUNT(*)               AS sales_count
-      FROM sold_items
-      WHERE day BETWEEN ? AND ?
-      GROUP BY day;
-    """, (start, end))
-    sales = dict(cur.fetchall())
 
-    # 3) Daily new‐listings counts
+def activity_by_day(cur, start, end):
+    """
+    Body of /api/insights-activity-data: sales and new-listing counts for
+    every day from start to end, zeros filled in.
+    """
+    # Daily sales and new-listing counts
     cur.execute("""
-      SELECT
-        substr(list_date,1,10)  AS day,
-        COUNT(*)                AS listings_count
-      FROM inventory_items
-      WHERE day BETWEEN ? AND ?
-      GROUP BY day;
+      SELECT day, sales_count, listings_count
+      FROM daily_stats
+      WHERE day BETWEEN ? AND ?;
     """, (start, end))
-    listings = dict(cur.fetchall())
-
-    conn.close()
+    sales, listings = {}, {}
+    for day, sales_count, listings_count in cur.fetchall():
+        sales[day] = sales_count
+        listings[day] = listings_count
 
-    # 4) Build a full range with zeros filled
+    # Build a full range with zeros filled
     start_dt = datetime.fromisoformat(start)
     end_dt   = datetime.fromisoformat(end)
     result   = []
@@ -885,9 +1550,10 @@ def api_insights_activity_data():
             "listings_count":  listings.get(d, 0)
         })
 
-    return jsonify(result)
+    return result
 
 
 if __name__ == '__main__':
+    migrate_once()
     # Run your Flask application in debug mode during development
     app.run(debug=True)
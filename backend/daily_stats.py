@@ -0,0 +1,100 @@
+"""
+'daily_stats' rollup: one row per day with the totals the insights
+dashboard shows, so its queries read a few hundred small rows instead of
+aggregating every sale.
+
+Triggers on sold_items and inventory_items record the days any write
+touches (old and new date) in 'daily_stats_dirty' (see dirty_keys.py);
+refresh_daily_stats() recomputes just those days from the source tables.
+"""
+from data_version import bump_data_version
+from dirty_keys import dirty_triggers, drain, ensure_triggers
+
+# Columns whose changes affect a day's totals
+SOLD_COLUMNS = (
+    "sold_date", "sold_for_price", "net_return", "item_cost",
+    "final_fee", "fixed_final_fee", "international_fee", "cost_to_ship",
+)
+INVENTORY_COLUMNS = ("list_date", "item_cost")
+
+# (table, date column, columns) the triggers watch
+WATCHED = (
+    ("sold_items",      "sold_date", SOLD_COLUMNS),
+    ("inventory_items", "list_date", INVENTORY_COLUMNS),
+)
+
+# Recompute the dirty days. Days with no sales and no listings left simply
+# get no row. npm_sum / npm_count keep AVG(net_return / sold_for_price)
+# exact when summed over a range.
+REBUILD_DIRTY_DAYS = """
+INSERT INTO daily_stats (
+    day, sales_count, gross, net, npm_sum, npm_count, marketplace_fees,
+    shipping_labels, cost_of_goods_sold, listings_count, spent_inventory
+)
+SELECT day, SUM(sales_count), SUM(gross), SUM(net), SUM(npm_sum), SUM(npm_count),
+       SUM(marketplace_fees), SUM(shipping_labels), SUM(cost_of_goods_sold),
+       SUM(listings_count), SUM(spent_inventory)
+FROM (
+    SELECT sold_day                            AS day,
+           COUNT(*)                            AS sales_count,
+           SUM(sold_for_price)                 AS gross,
+           SUM(net_return)                     AS net,
+           SUM(net_return * 1.0 / sold_for_price)   AS npm_sum,
+           COUNT(net_return * 1.0 / sold_for_price) AS npm_count,
+           SUM(COALESCE(final_fee, 0)
+               + COALESCE(fixed_final_fee, 0)
+               + COALESCE(international_fee, 0)) AS marketplace_fees,
+           SUM(cost_to_ship)                   AS shipping_labels,
+           SUM(item_cost)                      AS cost_of_goods_sold,
+           0                                   AS listings_count,
+           NULL                                AS spent_inventory
+    FROM sold_items
+    WHERE sold_day IN (SELECT day FROM daily_stats_dirty)
+    GROUP BY sold_day
+    UNION ALL
+    SELECT list_day, 0, NULL, NULL, NULL, 0, NULL, NULL, NULL,
+           COUNT(*), SUM(item_cost)
+    FROM inventory_items
+    WHERE list_day IN (SELECT day FROM daily_stats_dirty)
+    GROUP BY list_day
+)
+GROUP BY day;
+"""
+
+
+def _triggers(table, date_col, columns):
+    return dirty_triggers(f"{table}_daily_stats", table, "daily_stats_dirty",
+                          {"day": f"substr({{row}}.{date_col}, 1, 10)"},
+                          update_of=columns, skip_null=True)
+
+
+def ensure_daily_stats(cursor):
+    """
+    Create the triggers on each source table (the rollup tables come from
+    db/schema.sql). A table getting its triggers for the first time has
+    all its days marked dirty, since its existing rows were never counted.
+    """
+    for table, date_col, columns in WATCHED:
+        ensure_triggers(cursor, table, _triggers(table, date_col, columns), f"""
+        INSERT OR IGNORE INTO daily_stats_dirty
+        SELECT DISTINCT substr({date_col}, 1, 10) FROM {table} WHERE {date_col} IS NOT NULL
+        """)
+
+
+def refresh_daily_stats(cursor):
+    """
+    Recompute the rows of every dirty day and commit. Cheap no-op when
+    nothing changed since the last refresh. Returns the number of days
+    recomputed; if any, the data version is bumped too, which also catches
+    writes made outside the app.
+    """
+    n_days, _ = drain(cursor, "daily_stats_dirty", _rebuild_dirty_days)
+    if n_days:
+        bump_data_version(cursor)
+    cursor.connection.commit()
+    return n_days
+
+
+def _rebuild_dirty_days(cursor):
+    cursor.execute("DELETE FROM daily_stats WHERE day IN (SELECT day FROM daily_stats_dirty)")
+    cursor.execute(REBUILD_DIRTY_DAYS)
@@ -0,0 +1,86 @@
+"""
+A single counter in the database that goes up whenever a sync or an edit
+changes the data. Cached results and the read APIs' ETags are keyed by
+it, so a bump invalidates them in every worker process at once.
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+# File timestamps are only as fine as the kernel's clock tick, so a
+# database modified more recently than this may change again without its
+# stat() changing; VersionWatch re-reads the version until it has settled.
+SETTLE_SECONDS = 0.05
+
+
+def get_data_version(cursor):
+    """
+    The current version; 0 while the database has no schema yet.
+    """
+    try:
+        cursor.execute("SELECT version FROM data_version WHERE id = 1")
+    except sqlite3.OperationalError:
+        return 0
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def bump_data_version(cursor):
+    """
+    Increment the version as part of the caller's transaction (the caller
+    commits).
+    """
+    cursor.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+
+
+def _file_signature(db_path):
+    """
+    (mtime_ns, size) of the database and its WAL; any commit changes it.
+    """
+    signature = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class VersionWatch:
+    """
+    This process's last reading of the data version (and when it last
+    changed), trusted for as long as the database files are untouched: a
+    conditional GET is then answered from two stat() calls, without a
+    query.
+    """
+
+    def __init__(self):
+        self._known = {}  # db_path -> (signature, version, modified)
+        self._lock = threading.Lock()
+
+    def current(self, db_path, read):
+        """
+        (version, modified) for db_path, calling read() for the version
+        when the files changed since the last call. modified is an aware
+        UTC datetime, whole seconds, as HTTP dates are.
+        """
+        signature = _file_signature(db_path)
+        mtimes = [s[0] for s in signature if s is not None]
+        settled = bool(mtimes) and time.time_ns() - max(mtimes) > SETTLE_SECONDS * 1e9
+        with self._lock:
+            known = self._known.get(db_path)
+        if known is not None and known[0] == signature and settled:
+            return known[1], known[2]
+
+        version = read()
+        if known is not None and known[1] == version:
+            modified = known[2]
+        else:
+            seconds = max(mtimes) // 10**9 if mtimes else int(time.time())
+            modified = datetime.fromtimestamp(seconds, timezone.utc)
+        with self._lock:
+            self._known[db_path] = (signature, version, modified)
+        return version, modified
@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import threading
+
+# Connection tuning; each value can be overridden from the environment.
+#   SQLITE_CACHE_SIZE_KB   page cache per connection (default 64 MB)
+#   SQLITE_MMAP_SIZE       bytes of the file memory-mapped for reads (default 256 MB)
+#   SQLITE_BUSY_TIMEOUT_MS how long a writer waits for the lock before failing
+DEFAULT_CACHE_SIZE_KB = 65536
+DEFAULT_MMAP_SIZE = 268435456
+DEFAULT_BUSY_TIMEOUT_MS = 10000
+
+
+def connect(db_path, **kwargs):
+    """
+    Open db_path with the settings every Tally-O connection should use:
+
+    - journal_mode=WAL: readers see the last committed state while a sync
+      writes, instead of waiting on the rollback journal lock
+    - synchronous=NORMAL: safe with WAL (only the last commits can be lost
+      on power failure, never corrupted), and no fsync per commit
+    - a larger page cache, mmap'd reads and in-memory temp tables/indexes
+    - busy_timeout so concurrent writers queue instead of failing with
+      "database is locked"
+    """
+    busy_ms = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", DEFAULT_BUSY_TIMEOUT_MS))
+    kwargs.setdefault("timeout", busy_ms / 1000)
+    conn = sqlite3.connect(db_path, **kwargs)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{int(os.environ.get('SQLITE_CACHE_SIZE_KB', DEFAULT_CACHE_SIZE_KB))}")
+    conn.execute(f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', DEFAULT_MMAP_SIZE))}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA busy_timeout={busy_ms}")
+    return conn
+
+
+class ConnectionPool:
+    """
+    Reuses tuned connections across requests instead of opening (and
+    re-running the PRAGMAs for) a new one every time. Each connection keeps
+    its own prepared-statement cache, so repeated queries skip re-parsing.
+
+    A connection is only ever used by the thread that acquired it until it
+    is released; up to max_idle per database file are kept open in between.
+    max_idle=0 closes every connection on release (no pooling).
+    """
+
+    def __init__(self, max_idle=8, cached_statements=256):
+        self.max_idle = max_idle
+        self.cached_statements = cached_statements
+        self._idle = {}             # db_path -> [connection, ...]
+        self._paths = {}            # id(connection) -> db_path
+        self._lock = threading.Lock()
+
+    def acquire(self, db_path):
+        with self._lock:
+            idle = self._idle.get(db_path)
+            if idle:
+                return idle.pop()
+        conn = connect(db_path, check_same_thread=False,
+                       cached_statements=self.cached_statements)
+        with self._lock:
+            self._paths[id(conn)] = db_path
+        return conn
+
+    def release(self, conn):
+        """
+        Hand conn back: roll back anything left uncommitted, then keep it
+        for the next request or close it if the pool is full.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        with self._lock:
+            idle = self._idle.setdefault(self._paths[id(conn)], [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        self._discard(conn)
+
+    def _discard(self, conn):
+        with self._lock:
+            self._paths.pop(id(conn), None)
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                self._discard(conn)
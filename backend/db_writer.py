@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+from db_conn import connect
+
+
+def begin(cursor):
+    """
+    Open an explicit transaction on cursor's connection (unless one is
+    already open), so a batch of writes commits or rolls back as one.
+    """
+    if not cursor.connection.in_transaction:
+        cursor.execute("BEGIN")
+
+
+class SerialWriter:
+    """
+    Runs every database write of a sync on one dedicated thread that owns
+    the SQLite connection. Fetch phases running in parallel hand their rows
+    over with submit()/call(), so writes are serialized without locking.
+    """
+
+    def __init__(self, db_path):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._conn = self._pool.submit(connect, db_path).result()
+
+    def _run(self, fn, args):
+        return fn(self._conn.cursor(), *args)
+
+    def submit(self, fn, *args):
+        """
+        Queue fn(cursor, *args) on the writer thread; returns a Future.
+        """
+        return self._pool.submit(self._run, fn, args)
+
+    def call(self, fn, *args):
+        """
+        Run fn(cursor, *args) on the writer thread and wait for its result.
+        """
+        return self.submit(fn, *args).result()
+
+    def commit(self):
+        self._pool.submit(self._conn.commit).result()
+
+    def rollback(self):
+        self._pool.submit(self._conn.rollback).result()
+
+    def close(self):
+        self._pool.submit(self._conn.close).result()
+        self._pool.shutdown()
@@ -0,0 +1,90 @@
+"""
+Incrementally maintained derived tables (daily_stats, sold item metrics,
+transactions_grouped) share one pattern: triggers on the source table
+record the keys every write touches in a '<name>_dirty' table, whoever
+the writer is, and the derived table's refresh recomputes just those
+keys, then empties the dirty table. This module builds the triggers
+(the dirty tables are in db/schema.sql) and runs that drain step; each
+derived table supplies its keys and its recompute SQL.
+"""
+import sqlite3
+
+
+def _mark_sql(dirty, keys, row, skip_null):
+    values = [expr.format(row=row) for expr in keys.values()]
+    same = " AND ".join(f"{column} = {value}" for column, value in zip(keys, values))
+    not_null = "".join(f"{value} IS NOT NULL AND " for value in values) if skip_null else ""
+    # NOT EXISTS rather than INSERT OR IGNORE: the conflict policy of the
+    # statement firing the trigger (an UPSERT, the ingest's INSERT OR
+    # IGNORE) overrides the trigger's.
+    return (f"INSERT INTO {dirty} ({', '.join(keys)}) SELECT {', '.join(values)} "
+            f"WHERE {not_null}NOT EXISTS (SELECT 1 FROM {dirty} WHERE {same});")
+
+
+def dirty_triggers(prefix, source, dirty, keys, update_of=None,
+                   events=("INSERT", "UPDATE", "DELETE"), skip_null=False):
+    """
+    {name: CREATE TRIGGER statement} of the triggers (named
+    <prefix>_insert / _update / _delete) marking in `dirty` the keys of
+    the `source` rows each of events touches; an UPDATE marks the old and
+    the new key.
+
+    keys: {dirty column: SQL expression of the source row, with {row}
+    standing for NEW / OLD}. update_of: only fire on UPDATEs of these
+    columns. skip_null: don't mark keys that come out NULL.
+    """
+    marks = {"INSERT": ("NEW",), "UPDATE": ("OLD", "NEW"), "DELETE": ("OLD",)}
+    triggers = {}
+    for event in events:
+        name = f"{prefix}_{event.lower()}"
+        on = f"UPDATE OF {', '.join(update_of)}" if event == "UPDATE" and update_of else event
+        body = " ".join(_mark_sql(dirty, keys, row, skip_null) for row in marks[event])
+        triggers[name] = f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {on} ON {source} BEGIN {body} END;"
+    return triggers
+
+
+def ensure_triggers(cursor, source, triggers, mark_all=None):
+    """
+    Create triggers (from dirty_triggers) once `source` exists. When they
+    are first created, mark_all (SQL marking every existing key dirty) is
+    run too, since rows written before were never counted.
+    Returns True if the triggers were created now.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+    names = {row[0] for row in cursor.fetchall()}
+    if source not in names or next(iter(triggers)) in names:
+        return False
+    for sql in triggers.values():
+        cursor.execute(sql)
+    if mark_all:
+        cursor.execute(mark_all)
+    return True
+
+
+def drain(cursor, dirty, recompute, everything=False):
+    """
+    Recompute what `dirty` marks and empty it, in the caller's
+    transaction: recompute(cursor) runs only if some key is dirty (or
+    everything=True). Returns (number of dirty keys, recompute's result),
+    or (0, None) when nothing was dirty.
+    """
+    cursor.execute(f"SELECT COUNT(*) FROM {dirty}")
+    n_keys = cursor.fetchone()[0]
+    if not n_keys and not everything:
+        return 0, None
+    result = recompute(cursor)
+    cursor.execute(f"DELETE FROM {dirty}")
+    return n_keys, result
+
+
+def has_dirty(cursor, dirty):
+    """
+    Whether `dirty` marks any key. Only reads (False while the table
+    doesn't exist), so read requests can ask without taking the write
+    lock.
+    """
+    try:
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {dirty})")
+    except sqlite3.OperationalError:
+        return False
+    return bool(cursor.fetchone()[0])
@@ -0,0 +1,280 @@
+import os
+import time
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from rate_limit import TokenBucket, CallBudget, QuotaExceeded, backoff_delay, retry_after_seconds
+
+# eBay Trading API endpoint (GetMyeBaySelling, GetOrders, ...)
+EBAY_TRADING_URL = "https://api.ebay.com/ws/api.dll"
+
+# eBay Finances API endpoint for getTransactions
+EBAY_FINANCES_URL = "https://apiz.ebay.com/sell/finances/v1/transaction"
+
+# Set EBAY_API_BASE_URL (e.g. http://127.0.0.1:5055 for fake_ebay/server.py)
+# to send every eBay call to that host instead, keeping each URL's path.
+
+# Trading API schema version sent with every call
+EBAY_COMPATIBILITY_LEVEL = "967"
+
+# Max page size the Finances API accepts
+FINANCES_PAGE_LIMIT = 1000
+
+# How many Finances pages may be in flight at once (1 = one after another).
+# Override with the EBAY_FETCH_WORKERS environment variable.
+DEFAULT_FETCH_WORKERS = 4
+
+# Connections kept open per host; enough for every concurrent fetch path
+# (finances pages, trading pages, OAuth) to reuse a warm socket.
+POOL_MAXSIZE = 16
+
+# (connect, read) timeouts so a hung socket is retried instead of stalling a sync
+REQUEST_TIMEOUT = (10, 120)
+
+# Attempts after the first on 429 / 5xx / connection errors
+MAX_RETRIES = 5
+
+# Longest Retry-After we wait out; eBay asking for more than this means the
+# quota is spent, so the call fails with QuotaExceeded instead of stalling
+MAX_RETRY_AFTER = 60.0
+
+# Per-API call limits: a token bucket (calls/second, burst) keeps parallel
+# fetchers under eBay's short-term throttling, and `daily` mirrors the app's
+# daily call quota. Each value can be overridden with EBAY_<API>_RATE,
+# EBAY_<API>_BURST and EBAY_<API>_DAILY_LIMIT.
+API_LIMITS = {
+    "trading":  {"rate": 10.0, "burst": 20, "daily": 5000},
+    "finances": {"rate": 10.0, "burst": 20, "daily": 5000},
+    "identity": {"rate": 2.0,  "burst": 5,  "daily": 5000},
+    "oauth":    {"rate": 2.0,  "burst": 5,  "daily": None},
+}
+
+
+def _limit(api, key):
+    value = os.environ.get(f"EBAY_{api.upper()}_{'DAILY_LIMIT' if key == 'daily' else key.upper()}")
+    if value is None:
+        return API_LIMITS[api][key]
+    return float(value) if key == "rate" else int(value)
+
+
+buckets = {api: TokenBucket(_limit(api, "rate"), _limit(api, "burst")) for api in API_LIMITS}
+budget = CallBudget({api: _limit(api, "daily") for api in API_LIMITS})
+
+
+def _build_session():
+    """
+    One requests.Session shared by every eBay call, so pages reuse
+    keep-alive TCP+TLS connections instead of handshaking each time.
+    """
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, pool_block=True)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "Connection":      "keep-alive",
+    })
+    return s
+
+
+ebay_session = _build_session()
+
+
+def ebay_url(url):
+    """
+    url, moved onto EBAY_API_BASE_URL when that is set.
+    """
+    base = os.environ.get("EBAY_API_BASE_URL")
+    if not base:
+        return url
+    parts = urlsplit(url)
+    return base.rstrip("/") + parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+def ebay_request(api, call_name, method, url, retry=True, **kwargs):
+    """
+    Send one eBay API request over the shared session, rate limited by
+    api's token bucket and counted against its daily budget.
+
+    429, 5xx and connection errors are retried up to MAX_RETRIES times with
+    jittered exponential backoff, honouring Retry-After when eBay sends it
+    (up to MAX_RETRY_AFTER; a longer one raises QuotaExceeded).
+    The last response is returned if it still fails; a connection error on
+    the last attempt is raised. retry=False sends the request once, for
+    calls that must not be repeated (e.g. redeeming a single-use
+    authorization code).
+    """
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+    bucket = buckets[api]
+    max_retries = MAX_RETRIES if retry else 0
+    for attempt in range(max_retries + 1):
+        budget.record(call_name, "wait_seconds", bucket.acquire())
+        budget.spend(api, call_name)
+        try:
+            resp = ebay_session.request(method, ebay_url(url), **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            budget.record(call_name, "errors")
+            if attempt == max_retries:
+                raise
+            delay = backoff_delay(attempt)
+        else:
+            if resp.status_code != 429 and resp.status_code < 500:
+                return resp
+            budget.record(call_name, "throttled" if resp.status_code == 429 else "errors")
+            if attempt == max_retries:
+                return resp
+            delay = retry_after_seconds(resp)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            elif delay > MAX_RETRY_AFTER:
+                raise QuotaExceeded(f"eBay asked to retry {call_name} after {delay:.0f}s "
+                                    f"(more than {MAX_RETRY_AFTER:.0f}s); giving up")
+        budget.record(call_name, "retries")
+        budget.record(call_name, "wait_seconds", delay)
+        time.sleep(delay)
+
+
+_trading_headers = {}
+
+
+def trading_headers(call_name, dev_id=None, app_id=None, cert_id=None):
+    """
+    Prebuilt Trading API headers for call_name. Credentials default to the
+    EBAY_DEV_ID / EBAY_APP_ID / EBAY_CERT_ID environment variables.
+    """
+    dev_id  = dev_id  or os.environ.get("EBAY_DEV_ID")
+    app_id  = app_id  or os.environ.get("EBAY_APP_ID")
+    cert_id = cert_id or os.environ.get("EBAY_CERT_ID")
+    key = (call_name, dev_id, app_id, cert_id)
+    if key not in _trading_headers:
+        _trading_headers[key] = {
+            "X-EBAY-API-COMPATIBILITY-LEVEL": EBAY_COMPATIBILITY_LEVEL,
+            "X-EBAY-API-DEV-NAME":            dev_id,
+            "X-EBAY-API-APP-NAME":            app_id,
+            "X-EBAY-API-CERT-NAME":           cert_id,
+            "X-EBAY-API-CALL-NAME":           call_name,
+            "X-EBAY-API-SITEID":              "0",
+            "Content-Type":                   "text/xml",
+        }
+    return _trading_headers[key]
+
+
+def trading_post(call_name, xml, **credentials):
+    """
+    POST an XML request body to the Trading API (rate limited, with retries).
+    """
+    headers = trading_headers(call_name, **credentials)
+    return ebay_request("trading", call_name, "POST", EBAY_TRADING_URL, headers=headers, data=xml)
+
+
+def connection_stats():
+    """
+    Connections opened vs. requests sent across the session's pools.
+    With keep-alive working, connections stays far below requests.
+    """
+    connections = requests_sent = 0
+    for adapter in set(ebay_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            connections += pool.num_connections
+            requests_sent += pool.num_requests
+    return {"connections": connections, "requests": requests_sent}
+
+
+def fetch_workers():
+    """
+    Worker count for concurrent page fetches (EBAY_FETCH_WORKERS).
+    """
+    return int(os.environ.get("EBAY_FETCH_WORKERS", DEFAULT_FETCH_WORKERS))
+
+
+def get_transactions_page(headers, params, offset, limit=FINANCES_PAGE_LIMIT, on_body=None):
+    """
+    Fetch one page of the Finances API getTransactions call.
+    Returns the decoded JSON body ({} for 204 No Content).
+    on_body, if given, is called with the raw body of a 200 response.
+    """
+    page_params = dict(params, limit=limit, offset=offset)
+    resp = ebay_request("finances", "getTransactions", "GET", EBAY_FINANCES_URL,
+                        headers=headers, params=page_params)
+    if resp.status_code == 204:
+        return {}
+    if resp.status_code != 200:
+        raise RuntimeError(f"eBay getTransactions failed ({resp.status_code}): {resp.text}")
+    if on_body is not None:
+        on_body(resp.content)
+    return resp.json()
+
+
+def iter_transaction_pages(headers, params, max_workers=None, limit=FINANCES_PAGE_LIMIT,
+                           on_page=None, on_body=None):
+    """
+    Yield every page (list of transactions) matching params from the
+    Finances API, in offset order, as it arrives.
+
+    Page 1 is read first; its 'total' tells us how many offsets remain, and
+    those are fetched through a pool of at most max_workers threads that
+    stays at most max_workers pages ahead of the consumer, so memory is
+    bounded by that many pages rather than by the account's history.
+    max_workers=1 (or a response without 'total') falls back to fetching
+    one page after another.
+
+    on_page, if given, is called once per page fetched (from any thread),
+    on_body with each page's raw body (see get_transactions_page).
+    """
+    def fetch(offset):
+        page = get_transactions_page(headers, params, offset, limit, on_body)
+        if on_page is not None:
+            on_page()
+        return page
+
+    if max_workers is None:
+        max_workers = fetch_workers()
+
+    first = fetch(0)
+    txns = first.get("transactions", [])
+    total = first.get("total")
+    if not txns:
+        return
+    yield txns
+
+    if max_workers <= 1 or total is None:
+        offset = limit
+        while True:
+            txns = fetch(offset).get("transactions", [])
+            if not txns:
+                return
+            yield txns
+            offset += limit
+
+    offsets = iter(range(limit, int(total), limit))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque(pool.submit(fetch, offset) for offset in islice(offsets, max_workers))
+        while pending:
+            page = pending.popleft().result()
+            offset = next(offsets, None)
+            if offset is not None:
+                pending.append(pool.submit(fetch, offset))
+            yield page.get("transactions", [])
+
+
+def fetch_all_transactions(headers, params, max_workers=None, limit=FINANCES_PAGE_LIMIT,
+                           on_page=None, on_body=None):
+    """
+    Every transaction matching params, as one list (see
+    iter_transaction_pages). An error raised while paging carries the
+    transactions of the pages before the failed one in .transactions, so
+    callers can keep what was fetched.
+    """
+    txns = []
+    try:
+        for page in iter_transaction_pages(headers, params, max_workers, limit, on_page, on_body):
+            txns.extend(page)
+    except Exception as e:
+        e.transactions = txns
+        raise
+    return txns
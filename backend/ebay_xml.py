@@ -0,0 +1,98 @@
+import io
+import xml.etree.ElementTree as ET
+
+# Fields read from each <Item> of a GetMyeBaySelling ActiveList page
+ACTIVE_ITEM_FIELDS = (
+    "ItemID", "Title", "PictureDetails", "CurrentPrice", "BuyItNowPrice",
+    "StartTime", "SKU", "QuantityAvailable",
+)
+
+# Fields read from each <Transaction> of a GetMyeBaySelling SoldList page
+SOLD_TRANSACTION_FIELDS = (
+    "OrderLineItemID", "TransactionID", "TransactionPrice",
+    "ItemID", "Title", "GalleryURL", "StartTime", "EndTime",
+    "SKU", "QuantitySold", "ShippingServiceCost",
+)
+
+# Fields read from each <Transaction> of a GetOrders page
+ORDER_TRANSACTION_FIELDS = (
+    "OrderLineItemID", "TransactionID", "TransactionPrice", "CreatedDate",
+    "ItemID", "Title", "SKU", "QuantityPurchased", "ActualShippingCost",
+)
+
+# Response-level fields collected into `meta` (outside any record)
+PAGINATION_FIELDS = ("TotalNumberOfPages", "TotalNumberOfEntries", "HasMoreOrders", "Ack")
+
+
+def _local(tag):
+    # "{urn:ebay:apis:eBLBaseComponents}Item" -> "Item"
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_records(content, record_tag, fields, within=None, meta=None):
+    """
+    Stream a Trading API response and yield one dict per <record_tag>
+    element, holding the text of the first descendant of each name in
+    fields (the same value bs4's record.find(name).text gave). Elements
+    are removed from the tree as soon as their record is emitted, so
+    memory stays at one record regardless of page size.
+
+    within: only emit records nested under an element with this tag
+    (e.g. "ActiveList").
+    meta: optional dict that receives PAGINATION_FIELDS found outside
+    records (e.g. TotalNumberOfPages).
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    wanted = set(fields)
+    stack = []        # open elements, root first
+    inside = 0        # depth of open `within` elements
+    record = None     # dict being filled for the current record
+    record_depth = None
+
+    for event, elem in ET.iterparse(io.BytesIO(content), events=("start", "end")):
+        tag = _local(elem.tag)
+        if event == "start":
+            stack.append(elem)
+            if tag == within:
+                inside += 1
+            if record is None and tag == record_tag and (within is None or inside):
+                record = {}
+                record_depth = len(stack)
+            continue
+
+        stack.pop()
+        if record is not None:
+            if len(stack) + 1 == record_depth and tag == record_tag:
+                yield record
+                record = None
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
+            elif tag in wanted and tag not in record:
+                record[tag] = "".join(elem.itertext())
+        elif meta is not None and tag in PAGINATION_FIELDS and tag not in meta:
+            meta[tag] = elem.text or ""
+        if tag == within:
+            inside -= 1
+
+
+def parse_active_items(content, meta=None):
+    """
+    Yield one compact dict per <Item> in an ActiveList response.
+    """
+    return iter_records(content, "Item", ACTIVE_ITEM_FIELDS, within="ActiveList", meta=meta)
+
+
+def parse_sold_transactions(content, meta=None):
+    """
+    Yield one compact dict per <Transaction> in a SoldList response.
+    """
+    return iter_records(content, "Transaction", SOLD_TRANSACTION_FIELDS, within="SoldList", meta=meta)
+
+
+def parse_order_transactions(content, meta=None):
+    """
+    Yield one compact dict per <Transaction> in a GetOrders response.
+    """
+    return iter_records(content, "Transaction", ORDER_TRANSACTION_FIELDS, within="OrderArray", meta=meta)
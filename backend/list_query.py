@@ -0,0 +1,257 @@
+"""
+Keyset ("seek") pagination, filtering and sorting for the /api/sold-items
+and /api/inventory-items list endpoints.
+
+A page is read by walking an index on (sort column, primary key) from the
+position after the last row of the previous page, which the client passes
+back as an opaque cursor. Every page costs the same, however deep, and
+rows inserted meanwhile don't shift the page boundaries.
+
+Rows without a value in the sort column come last in either direction.
+They're read as a second segment of the same index (sort column IS NULL,
+ordered by the primary key), so both segments are index range scans.
+"""
+import base64
+import binascii
+import json
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+class ListSpec:
+    """
+    How one table is listed: its unique key (the tie-break after the sort
+    column), the sort options (name -> column, each backed by an index on
+    (column, *key)) and the YYYY-MM-DD column the date-range filter uses.
+    """
+
+    def __init__(self, table, key, sorts, default_sort, day_column):
+        self.table = table
+        self.key = key
+        self.sorts = sorts
+        self.default_sort = default_sort
+        self.day_column = day_column
+
+
+SOLD_ITEMS = ListSpec(
+    "sold_items",
+    key=("order_id", "transaction_id"),
+    sorts={"sold_date": "sold_date", "sold_for_price": "sold_for_price", "net_return": "net_return"},
+    default_sort="sold_date",
+    day_column="sold_day",
+)
+
+INVENTORY_ITEMS = ListSpec(
+    "inventory_items",
+    key=("item_id",),
+    sorts={"list_date": "list_date", "list_price": "list_price", "item_cost": "item_cost"},
+    default_sort="list_date",
+    day_column="list_day",
+)
+
+
+def encode_cursor(sort, order, values):
+    raw = json.dumps([sort, order, list(values)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, sort, order, n_values):
+    """
+    The key values stored in token, which must have been issued for the
+    same sort and order. Raises ValueError for anything else.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        token_sort, token_order, values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if (token_sort, token_order) != (sort, order) or not isinstance(values, list) \
+            or len(values) != n_values:
+        raise ValueError("Cursor does not match this sort order")
+    return values
+
+
+def table_columns(cursor, table):
+    # table_xinfo (unlike table_info) also lists generated columns
+    cursor.execute(f"PRAGMA table_xinfo({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def parse_fields(cursor, spec, value):
+    """
+    The columns named in a ?fields= value (comma-separated), checked
+    against the table since they end up in the SQL. The key columns are
+    always included, so rows can be edited. None (every column) when no
+    fields were asked for.
+    """
+    if not value:
+        return None
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = set(fields) - set(table_columns(cursor, spec.table))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [k for k in spec.key if k not in fields] + list(dict.fromkeys(fields))
+
+
+def parse_limit(value):
+    if value in (None, ""):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _filters(spec, args):
+    """
+    WHERE conditions and parameters for the filter query parameters:
+    start_date / end_date (YYYY-MM-DD, inclusive), sku, purchased_at
+    (exact matches) and q (case-insensitive title search).
+    """
+    where, params = [], []
+    if args.get("start_date"):
+        where.append(f"{spec.day_column} >= ?")
+        params.append(args["start_date"])
+    if args.get("end_date"):
+        where.append(f"{spec.day_column} <= ?")
+        params.append(args["end_date"])
+    for column in ("sku", "purchased_at"):
+        if args.get(column):
+            where.append(f"{column} = ?")
+            params.append(args[column])
+    if args.get("q"):
+        escaped = args["q"].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        where.append("item_title LIKE ? ESCAPE '\\'")
+        params.append(f"%{escaped}%")
+    return where, params
+
+
+class ListQuery:
+    """
+    The parsed query parameters of one list request (see _filters, plus
+    sort, order=asc|desc, limit, cursor and fields). Raises ValueError for
+    invalid ones.
+    """
+
+    def __init__(self, cursor, spec, args):
+        self.spec = spec
+        self.sort = args.get("sort") or spec.default_sort
+        if self.sort not in spec.sorts:
+            raise ValueError(f"sort must be one of: {', '.join(spec.sorts)}")
+        self.order = (args.get("order") or "desc").lower()
+        if self.order not in ("asc", "desc"):
+            raise ValueError("order must be asc or desc")
+        self.limit = parse_limit(args.get("limit"))
+        self.column = spec.sorts[self.sort]
+        self.fields = parse_fields(cursor, spec, args.get("fields"))
+        # The sort column is read for the next cursor even when not asked for
+        self.selected = "*"
+        if self.fields is not None:
+            extra = [self.column] if self.column not in self.fields else []
+            self.selected = ", ".join(self.fields + extra)
+        self.after = None
+        if args.get("cursor"):
+            self.after = decode_cursor(args["cursor"], self.sort, self.order, 1 + len(spec.key))
+        self.where, self.params = _filters(spec, args)
+
+    def segments(self):
+        """
+        (sql, parameters) of the non-NULL and the NULL segment, in order,
+        each taking a LIMIT as its last parameter. The non-NULL one is None
+        when the cursor is already past it.
+        """
+        spec, column, after = self.spec, self.column, self.after
+        op = "<" if self.order == "desc" else ">"
+
+        def segment(conditions, seek_columns, seek_values):
+            conditions = self.where + conditions
+            values = self.params[:]
+            if seek_values is not None:
+                conditions.append(f"({', '.join(seek_columns)}) {op} ({', '.join('?' * len(seek_columns))})")
+                values += seek_values
+            order_by = ", ".join(f"{c} {self.order.upper()}" for c in seek_columns)
+            sql = (f"SELECT {self.selected} FROM {spec.table} WHERE {' AND '.join(conditions)} "
+                   f"ORDER BY {order_by} LIMIT ?")
+            return sql, values
+
+        first = None
+        if after is None or after[0] is not None:
+            first = segment([f"{column} IS NOT NULL"], (column,) + spec.key, after)
+        seek = after[1:] if after is not None and after[0] is None else None
+        return first, segment([f"{column} IS NULL"], spec.key, seek)
+
+    def drop_extra_column(self, columns, rows):
+        # Drop the sort column again if it was only read for the cursor
+        if self.fields is not None and self.column not in self.fields:
+            return columns[:-1], [row[:-1] for row in rows]
+        return columns, rows
+
+
+def list_page(cursor, spec, args):
+    """
+    One page of spec's table for the request's query parameters (see
+    ListQuery, plus format) as {"items": [row dicts], "next_cursor": token
+    or None}, or with format=columns as {"columns": {name: [values]},
+    "next_cursor": ...}: each column name once instead of once per row.
+    Raises ValueError for invalid parameters.
+    """
+    shape = args.get("format") or "rows"
+    if shape not in ("rows", "columns"):
+        raise ValueError("format must be rows, columns or ndjson")
+    query = ListQuery(cursor, spec, args)
+    limit, column = query.limit, query.column
+    first, second = query.segments()
+
+    # One row past the limit tells whether there's a next page
+    rows = []
+    if first is not None:
+        sql, values = first
+        cursor.execute(sql, values + [limit + 1])
+        rows = cursor.fetchall()
+    if len(rows) <= limit:
+        sql, values = second
+        cursor.execute(sql, values + [limit + 1 - len(rows)])
+        rows += cursor.fetchall()
+    columns = [c[0] for c in cursor.description]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = dict(zip(columns, rows[-1]))
+        next_cursor = encode_cursor(query.sort, query.order, [last[column]] + [last[k] for k in spec.key])
+
+    columns, rows = query.drop_extra_column(columns, rows)
+    if shape == "columns":
+        values = list(zip(*rows)) if rows else [()] * len(columns)
+        return {"columns": {name: list(v) for name, v in zip(columns, values)},
+                "next_cursor": next_cursor}
+    return {"items": [dict(zip(columns, row)) for row in rows], "next_cursor": next_cursor}
+
+
+def export_batches(cursor, spec, args, batch_size=500):
+    """
+    Every row matching the request's filters, in its sort order, from its
+    cursor if one is given (limit doesn't apply), as lists of row dicts
+    read with fetchmany, for streamed responses.
+    The parameters are checked before the first row is read, so invalid
+    ones raise ValueError on the call itself rather than mid-stream.
+    """
+    query = ListQuery(cursor, spec, args)
+
+    def batches():
+        for segment in query.segments():
+            if segment is None:
+                continue
+            sql, values = segment
+            cursor.execute(sql, values + [-1])   # LIMIT -1: no limit
+            columns = [c[0] for c in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                names, rows = query.drop_extra_column(columns, rows)
+                yield [dict(zip(names, row)) for row in rows]
+
+    return batches()
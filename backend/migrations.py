@@ -0,0 +1,62 @@
+"""
+Creates the schema (db/schema.sql, the only place tables and indexes are
+declared) and upgrades databases created before a column was added to
+it. Every step checks what is already there, so migrate() is safe to run
+on every start-up and on fresh databases.
+"""
+import os
+
+from daily_stats import ensure_daily_stats, refresh_daily_stats
+from sold_metrics import ensure_sold_metrics, refresh_sold_metrics
+from transactions_grouped import ensure_transactions_grouped
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "db", "schema.sql")
+
+# (table, column, definition) added to existing tables.
+# sold_day / list_day are the YYYY-MM-DD part of the eBay timestamps, as
+# VIRTUAL generated columns: nothing to backfill, and their indexes in
+# db/schema.sql make the insights date-range filters index range scans.
+COLUMNS = (
+    ("sold_items",      "sold_day", "TEXT GENERATED ALWAYS AS (substr(sold_date, 1, 10)) VIRTUAL"),
+    ("inventory_items", "list_day", "TEXT GENERATED ALWAYS AS (substr(list_date, 1, 10)) VIRTUAL"),
+)
+
+
+def _tables(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _columns(cursor, table):
+    # table_xinfo (unlike table_info) also lists generated columns
+    cursor.execute(f"PRAGMA table_xinfo({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def migrate(conn):
+    """
+    Add any missing COLUMNS to the tables that exist in conn, then create
+    whatever tables and indexes of db/schema.sql are missing.
+    """
+    cursor = conn.cursor()
+    tables = _tables(cursor)
+    applied = []
+    for table, column, definition in COLUMNS:
+        if table in tables and column not in _columns(cursor, table):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            applied.append(f"{table}.{column}")
+    conn.commit()
+    # After the columns: the schema's indexes cover them
+    with open(SCHEMA_PATH) as f:
+        cursor.executescript(f.read())
+    # The derived tables' triggers, then whatever they mark (everything,
+    # when the triggers are new)
+    ensure_transactions_grouped(cursor)
+    ensure_sold_metrics(cursor)
+    ensure_daily_stats(cursor)
+    conn.commit()
+    refresh_sold_metrics(cursor)
+    refresh_daily_stats(cursor)
+    if applied:
+        print(f"Migrated database: added {', '.join(applied)}.")
+    return applied
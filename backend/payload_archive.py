@@ -0,0 +1,188 @@
+"""
+Archive of the raw eBay response bodies a sync parsed (Trading API XML
+pages, Finances API JSON pages), so the data can be derived again with a
+fixed or extended parser without calling eBay (see reprocess.py).
+
+Bodies are stored compressed in a separate SQLite file next to the main
+database, keyed by the SHA-256 of the body without the fields eBay
+changes on every response (VOLATILE_ELEMENTS): a page that comes back
+otherwise unchanged (an ActiveList that didn't move, a re-read overlap)
+is stored once. Every fetch is logged in 'payload_fetches', so bodies
+can be replayed in the order they were fetched.
+
+Fetches older than RETENTION_DAYS are pruned after every sync, along
+with the bodies only they referenced.
+"""
+import hashlib
+import lzma
+import os
+import re
+import threading
+import zlib
+from datetime import datetime, timedelta
+
+from db_conn import connect
+
+# Codec used for new bodies; both can be read back. lzma preset 0 packs
+# Trading XML about twice as tight as zlib for a couple of ms per page.
+ARCHIVE_CODEC = "lzma"
+LZMA_PRESET = 0
+
+CODECS = {
+    "lzma": (lambda body: lzma.compress(body, preset=LZMA_PRESET), lzma.decompress),
+    "zlib": (lambda body: zlib.compress(body, 6), zlib.decompress),
+}
+
+# Set PAYLOAD_ARCHIVE=0 to stop archiving response bodies
+ENABLED = os.environ.get("PAYLOAD_ARCHIVE", "1") != "0"
+
+# Days of fetches kept (PAYLOAD_ARCHIVE_DAYS); 0 keeps everything
+RETENTION_DAYS = int(os.environ.get("PAYLOAD_ARCHIVE_DAYS", 90))
+
+# Trading API elements that differ between two responses carrying the
+# same data (response metadata, and TimeLeft, which counts down every
+# call); left out of the digest only, the stored body keeps them
+VOLATILE_ELEMENTS = ("Timestamp", "Build", "CorrelationID", "HardExpirationWarning", "TimeLeft")
+_VOLATILE = re.compile(rb"<(%s)>[^<]*</\1>" % "|".join(VOLATILE_ELEMENTS).encode())
+
+CREATE_TABLES = ("""
+CREATE TABLE IF NOT EXISTS payloads (
+    digest TEXT    PRIMARY KEY,
+    codec  TEXT    NOT NULL,
+    size   INTEGER NOT NULL,
+    data   BLOB    NOT NULL
+);
+""", """
+CREATE TABLE IF NOT EXISTS payload_fetches (
+    id         INTEGER PRIMARY KEY,
+    kind       TEXT    NOT NULL,
+    digest     TEXT    NOT NULL REFERENCES payloads (digest),
+    fetched_at TEXT    NOT NULL
+);
+""", """
+CREATE INDEX IF NOT EXISTS idx_payload_fetches_kind ON payload_fetches (kind, id);
+""")
+
+
+def archive_path(db_path):
+    """
+    The archive file that goes with the database at db_path.
+    """
+    root, ext = os.path.splitext(db_path)
+    return f"{root}_archive{ext or '.db'}"
+
+
+def decompress(codec, data):
+    return CODECS[codec][1](data)
+
+
+def digest_of(body):
+    """
+    Content key of a body (bytes): SHA-256 of it without VOLATILE_ELEMENTS.
+    """
+    return hashlib.sha256(_VOLATILE.sub(b"", body)).hexdigest()
+
+
+class PayloadArchive:
+    """
+    Thread-safe writer for one archive file. Bodies are hashed and
+    compressed on the calling thread (zlib and lzma release the GIL, so
+    concurrent fetchers compress in parallel); only the insert itself is
+    serialized. The connection is opened on first use.
+    """
+
+    def __init__(self, path, codec=ARCHIVE_CODEC):
+        self.path = path
+        self.codec = codec
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = connect(self.path, check_same_thread=False)
+            for sql in CREATE_TABLES:
+                self._conn.execute(sql)
+            self._conn.commit()
+        return self._conn
+
+    def store(self, kind, body):
+        """
+        Archive one response body (bytes or str) fetched for kind (e.g.
+        "sold_list"). Returns its digest.
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        digest = digest_of(body)
+        with self._lock:
+            conn = self._connection()
+            known = conn.execute("SELECT 1 FROM payloads WHERE digest = ?", (digest,)).fetchone()
+        data = None if known else CODECS[self.codec][0](body)
+        with self._lock:
+            conn = self._connection()
+            if data is not None:
+                conn.execute("INSERT OR IGNORE INTO payloads (digest, codec, size, data) VALUES (?, ?, ?, ?)",
+                             (digest, self.codec, len(body), data))
+            conn.execute("INSERT INTO payload_fetches (kind, digest, fetched_at) VALUES (?, ?, ?)",
+                         (kind, digest, datetime.utcnow().isoformat()))
+            conn.commit()
+        return digest
+
+    def prune(self, days=RETENTION_DAYS):
+        """
+        Forget the fetches older than days, and the bodies no remaining
+        fetch refers to. days=0 keeps everything. Returns (fetches,
+        bodies) deleted.
+        """
+        if not days:
+            return 0, 0
+        cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
+        with self._lock:
+            conn = self._connection()
+            n_fetches = conn.execute("DELETE FROM payload_fetches WHERE fetched_at < ?", (cutoff,)).rowcount
+            n_bodies = conn.execute("""
+            DELETE FROM payloads
+            WHERE digest NOT IN (SELECT digest FROM payload_fetches)
+            """).rowcount
+            conn.commit()
+        return n_fetches, n_bodies
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def archive_for(path):
+    """
+    The shared PayloadArchive writing to path.
+    """
+    with _archives_lock:
+        if path not in _archives:
+            _archives[path] = PayloadArchive(path)
+        return _archives[path]
+
+
+def iter_payloads(conn, kind):
+    """
+    (codec, compressed body) of every distinct body archived for kind, in
+    the order each was last fetched, so replaying them leaves the latest
+    state of every record, as the syncs did.
+    """
+    cursor = conn.execute("""
+    SELECT p.codec, p.data
+    FROM (SELECT digest, MAX(id) AS last_id
+          FROM payload_fetches WHERE kind = ?
+          GROUP BY digest) AS f
+    JOIN payloads AS p ON p.digest = f.digest
+    ORDER BY f.last_id
+    """, (kind,))
+    while True:
+        rows = cursor.fetchmany(100)
+        if not rows:
+            return
+        yield from rows
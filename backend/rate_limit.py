@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """
+    Classic token bucket: up to `burst` calls at once, refilled at `rate`
+    calls per second. acquire() blocks until a token is available and
+    returns how long it waited.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class QuotaExceeded(RuntimeError):
+    """
+    Raised instead of calling eBay once an API's daily call quota is used up.
+    """
+
+
+class CallBudget:
+    """
+    Per-API daily quota plus per-call-name counters (calls, retries,
+    throttled responses, errors, time spent waiting on the bucket/backoff).
+    Days roll over at midnight UTC.
+    """
+
+    def __init__(self, daily_limits):
+        self.daily_limits = dict(daily_limits)
+        self._day = None
+        self._used = {}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _roll(self):
+        today = datetime.now(timezone.utc).date().isoformat()
+        if today != self._day:
+            self._day = today
+            self._used = {}
+
+    def spend(self, api, call_name):
+        with self._lock:
+            self._roll()
+            limit = self.daily_limits.get(api)
+            used = self._used.get(api, 0)
+            if limit is not None and used >= limit:
+                raise QuotaExceeded(f"Daily eBay {api} quota of {limit} calls used up ({call_name})")
+            self._used[api] = used + 1
+            self._counter(call_name)["calls"] += 1
+
+    def record(self, call_name, field, amount=1):
+        with self._lock:
+            self._counter(call_name)[field] += amount
+
+    def _counter(self, call_name):
+        return self._calls.setdefault(call_name, {
+            "calls": 0, "retries": 0, "throttled": 0, "errors": 0, "wait_seconds": 0.0,
+        })
+
+    def report(self):
+        with self._lock:
+            self._roll()
+            return {
+                "day": self._day,
+                "apis": {
+                    api: {
+                        "used": self._used.get(api, 0),
+                        "limit": limit,
+                        "remaining": None if limit is None else max(0, limit - self._used.get(api, 0)),
+                    }
+                    for api, limit in self.daily_limits.items()
+                },
+                "calls": {
+                    name: dict(c, wait_seconds=round(c["wait_seconds"], 3))
+                    for name, c in self._calls.items()
+                },
+            }
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """
+    Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)].
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after_seconds(resp):
+    """
+    Seconds requested by a Retry-After header (delta or HTTP date), or None.
+    """
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        # NaN would slip through max() and sleep() alike
+        return max(0.0, seconds) if seconds == seconds else None
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
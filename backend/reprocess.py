@@ -0,0 +1,172 @@
+"""
+Derive the synced tables again from the payload archive (see
+payload_archive.py) instead of calling eBay: every archived page is
+parsed with the current parsers and written over what is stored (manual
+fields such as item_cost excepted), then fees, metrics and daily stats
+are re-applied. Use it after fixing a parser or adding a column it
+fills.
+
+Pages are decompressed and parsed by a pool of worker processes, at
+most a few pages per worker ahead of the single writer, so parsing runs
+on every core while memory stays flat.
+
+Usage (from the repo root):
+    python backend/reprocess.py [--workers N] [--db PATH] [kind ...]
+    python backend/reprocess.py --prune DAYS [--db PATH]
+
+kinds: active_list, orders, sold_list, transactions (default: all, in
+that order, so SoldList values win over GetOrders ones as in a sync).
+--prune only drops the archived fetches older than DAYS (syncs already
+apply PAYLOAD_ARCHIVE_DAYS).
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import app
+from daily_stats import refresh_daily_stats
+from data_version import bump_data_version
+from sold_metrics import refresh_sold_metrics
+from db_conn import connect
+from db_writer import begin
+from payload_archive import PayloadArchive, archive_path, decompress, iter_payloads
+from transactions_grouped import event_row, refresh_transactions_grouped, store_events
+
+# Parsed pages written per transaction
+WRITE_BATCH_PAGES = 20
+
+
+def parse_transaction_rows(content):
+    """
+    Parse one Finances getTransactions page into 'transactions' rows.
+    """
+    return [event_row(txn) for txn in json.loads(content).get("transactions", [])]
+
+
+def store_order_pages(cursor, pages):
+    begin(cursor)
+    for rows in pages:
+        app.merge_order_rows(cursor, rows, overwrite=True)
+    bump_data_version(cursor)
+    cursor.connection.commit()
+
+
+def store_transaction_pages(cursor, pages):
+    begin(cursor)
+    for rows in pages:
+        store_events(cursor, rows, overwrite=True)
+    cursor.connection.commit()
+
+
+# kind -> (parser of one body into row tuples, writer of a list of parsed pages)
+KINDS = {
+    "active_list":  (app.parse_active_list_rows, app.upsert_inventory_items),
+    "orders":       (app.parse_order_rows,       store_order_pages),
+    "sold_list":    (app.parse_sold_list_rows,   app.upsert_sold_items),
+    "transactions": (parse_transaction_rows,     store_transaction_pages),
+}
+
+
+def parse_payload(payload):
+    """
+    Worker process body: decompress and parse one archived page.
+    """
+    kind, codec, data = payload
+    return KINDS[kind][0](decompress(codec, data))
+
+
+def parse_in_order(pool, payloads, window):
+    """
+    Parsed rows of each payload, in order, with at most `window` pages
+    being parsed or waiting to be written at any time.
+    """
+    payloads = iter(payloads)
+    pending = deque(pool.submit(parse_payload, p) for p in islice(payloads, window))
+    while pending:
+        rows = pending.popleft().result()
+        payload = next(payloads, None)
+        if payload is not None:
+            pending.append(pool.submit(parse_payload, payload))
+        yield rows
+
+
+def reprocess(db_path, kinds, workers=None):
+    """
+    Replay the archived pages of kinds into the database at db_path.
+    Returns {kind: (pages, rows)}.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Importing app doesn't migrate anything, so create or upgrade this database here
+    app.migrate_db(db_path)
+    archive = connect(archive_path(db_path))
+    conn = connect(db_path)
+    cursor = conn.cursor()
+    counts = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for kind in kinds:
+            _, write = KINDS[kind]
+            payloads = ((kind, codec, data) for codec, data in iter_payloads(archive, kind))
+            n_pages = n_rows = 0
+            batch = []
+            for rows in parse_in_order(pool, payloads, 2 * workers):
+                n_pages += 1
+                n_rows += len(rows)
+                batch.append(rows)
+                if len(batch) == WRITE_BATCH_PAGES:
+                    write(cursor, batch)
+                    batch = []
+            if batch:
+                write(cursor, batch)
+            counts[kind] = (n_pages, n_rows)
+            print(f"Reprocessed {n_pages} archived {kind} pages ({n_rows} rows).")
+
+    if "transactions" in kinds:
+        refresh_transactions_grouped(cursor)
+        bump_data_version(cursor)
+        conn.commit()
+    app.update_sold_data(cursor)
+    refresh_sold_metrics(cursor)
+    refresh_daily_stats(cursor)
+    conn.close()
+    archive.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-derive the synced tables from the payload archive.")
+    parser.add_argument("kinds", nargs="*", metavar="kind",
+                        help=f"page kinds to replay ({', '.join(KINDS)}; default: all)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parser processes (default: one per CPU)")
+    parser.add_argument("--db", default=app.db_path, help="database to write to")
+    parser.add_argument("--prune", type=int, metavar="DAYS",
+                        help="only drop archived fetches older than DAYS, then exit")
+    args = parser.parse_args()
+    unknown = set(args.kinds) - set(KINDS)
+    if unknown:
+        parser.error(f"unknown kinds: {', '.join(sorted(unknown))}")
+    if not os.path.exists(archive_path(args.db)):
+        parser.error(f"no payload archive at {archive_path(args.db)}")
+
+    if args.prune is not None:
+        if args.prune < 1:
+            parser.error("--prune needs at least 1 day")
+        archive = PayloadArchive(archive_path(args.db))
+        n_fetches, n_bodies = archive.prune(args.prune)
+        archive.close()
+        print(f"Pruned {n_fetches} archived fetches ({n_bodies} bodies).")
+        return
+
+    start = time.perf_counter()
+    kinds = [kind for kind in KINDS if kind in args.kinds] if args.kinds else list(KINDS)
+    reprocess(args.db, kinds, args.workers)
+    print(f"Reprocessing completed in {time.perf_counter() - start:.2f} seconds.")
+
+
+if __name__ == "__main__":
+    main()
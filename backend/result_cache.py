@@ -0,0 +1,39 @@
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Small in-process LRU cache for computed responses, tied to the
+    database's data version: asking with a newer version than the cached
+    entries were built under drops them all.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version, key, compute):
+        """
+        Cached value for key at version, or compute() stored under it.
+        """
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            elif key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = value
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
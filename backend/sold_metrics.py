@@ -0,0 +1,92 @@
+"""
+Profit metrics of each sold item (net_return, roi, net_profit_margin),
+kept current on the server instead of being computed by the page when
+someone edits a cost.
+
+Triggers on sold_items record every row whose inputs (price, shipping,
+fees, cost) a write touches in 'sold_metrics_dirty' (see dirty_keys.py);
+refresh_sold_metrics() recomputes just those rows with one UPDATE.
+"""
+from data_version import bump_data_version
+from dirty_keys import dirty_triggers, drain, ensure_triggers
+
+# Columns the metrics are computed from
+INPUT_COLUMNS = (
+    "sold_for_price", "shipping_paid", "final_fee", "fixed_final_fee",
+    "international_fee", "cost_to_ship", "item_cost",
+)
+
+CREATE_TRIGGERS = dirty_triggers(
+    "sold_items_metrics", "sold_items", "sold_metrics_dirty",
+    {"order_id": "{row}.order_id", "transaction_id": "{row}.transaction_id"},
+    update_of=INPUT_COLUMNS, events=("INSERT", "UPDATE"),
+)
+
+# The sold items page's formulas, missing values counting as 0:
+#   net_return        = price + shipping paid - (fees + label + cost)
+#   roi               = net_return / cost * 100                (0 without a cost)
+#   net_profit_margin = net_return / (price + shipping paid) * 100
+# Rows whose metrics come out unchanged aren't written, so they don't
+# mark their day dirty in daily_stats either.
+UPDATE_METRICS = """
+UPDATE sold_items
+SET net_return        = m.net_return,
+    roi               = m.roi,
+    net_profit_margin = m.net_profit_margin
+FROM (
+    SELECT order_id, transaction_id, net_return,
+           CASE WHEN cost > 0 THEN net_return * 100.0 / cost ELSE 0 END AS roi,
+           CASE WHEN revenue > 0 THEN net_return * 100.0 / revenue ELSE 0 END AS net_profit_margin
+    FROM (
+        SELECT order_id, transaction_id, cost, revenue,
+               revenue - (fees + cost) AS net_return
+        FROM (
+            SELECT order_id, transaction_id,
+                   COALESCE(item_cost, 0) AS cost,
+                   COALESCE(sold_for_price, 0) + COALESCE(shipping_paid, 0) AS revenue,
+                   COALESCE(final_fee, 0) + COALESCE(fixed_final_fee, 0)
+                   + COALESCE(international_fee, 0) + COALESCE(cost_to_ship, 0) AS fees
+            FROM sold_items
+            {scope}
+        )
+    )
+) AS m
+WHERE sold_items.order_id = m.order_id
+  AND sold_items.transaction_id = m.transaction_id
+  AND (sold_items.net_return IS NOT m.net_return
+       OR sold_items.roi IS NOT m.roi
+       OR sold_items.net_profit_margin IS NOT m.net_profit_margin);
+"""
+
+DIRTY_SCOPE = "WHERE (order_id, transaction_id) IN (SELECT order_id, transaction_id FROM sold_metrics_dirty)"
+
+
+def ensure_sold_metrics(cursor):
+    """
+    Create the triggers on sold_items (the tables come from db/schema.sql).
+    When they are first created every row is marked dirty, since existing
+    rows may never have had metrics computed.
+    """
+    ensure_triggers(cursor, "sold_items", CREATE_TRIGGERS, """
+    INSERT OR IGNORE INTO sold_metrics_dirty SELECT order_id, transaction_id FROM sold_items
+    """)
+
+
+def refresh_sold_metrics(cursor, everything=False):
+    """
+    Recompute the metrics of every dirty row (or, with everything=True, of
+    the whole table) and commit. Run it before refresh_daily_stats, whose
+    totals include net_return. Returns the number of rows whose metrics
+    changed; if any, the data version is bumped.
+    """
+    scope = "" if everything else DIRTY_SCOPE
+
+    def update(cursor):
+        cursor.execute(UPDATE_METRICS.format(scope=scope))
+        return cursor.rowcount
+
+    _, n_rows = drain(cursor, "sold_metrics_dirty", update, everything)
+    if n_rows:
+        bump_data_version(cursor)
+    cursor.connection.commit()
+    return n_rows or 0
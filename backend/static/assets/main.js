@@ -9,33 +9,187 @@ document.addEventListener("DOMContentLoaded", () => {
     });
   }
 
-  // 3. Fetch and render sold items data
-  fetch("/api/sold-items")
-    .then((response) => response.json())
-    .then((data) => {
-      const tableBody = document.querySelector("#sold-items-table tbody");
-      if (tableBody && Array.isArray(data)) {
-        data.forEach((item) => {
-          // 1. Format sold_date
-          const soldDateFormatted = item.sold_date
-            ? new Date(item.sold_date).toLocaleDateString("en-US", {
-                year: "numeric",
-                month: "long",
-                day: "numeric",
-              })
-            : "";
-
-          const row = document.createElement("tr");
-          row.dataset.orderId = item.order_id;
-          row.dataset.finalFee = item.final_fee;
-          row.dataset.fixedFinalFee = item.fixed_final_fee;
-          row.dataset.internationalFee = item.international_fee;
-          row.dataset.costToShip = item.cost_to_ship;
-          row.dataset.shippingPaid = item.shipping_paid;
-          row.dataset.netProfitMargin = item.net_profit_margin;
-          row.dataset.soldForPrice = item.sold_for_price;
-
-          row.innerHTML = `
+  // Page through a list API (keyset cursors), appending each page's rows
+  // to tbody. Only the given fields are requested, in the columnar format.
+  // The next page loads when the "Load more" button under the table
+  // scrolls into view or is clicked. A <form class="list-filters"> on the
+  // page supplies the filter / sort query parameters.
+  function pagedTable(url, tbody, fields, renderRow) {
+    const table = tbody.closest("table");
+    const more = document.createElement("button");
+    more.className = "load-more";
+    more.textContent = "Load more";
+    more.hidden = true;
+    table.after(more);
+
+    let params = new URLSearchParams();
+    let cursor = null;
+    let loading = false;
+    let generation = 0; // bumped on reload, so stale pages are dropped
+
+    async function loadPage() {
+      if (loading) return;
+      loading = true;
+      const gen = generation;
+      try {
+        const query = new URLSearchParams(params);
+        query.set("fields", fields.join(","));
+        query.set("format", "columns");
+        if (cursor) query.set("cursor", cursor);
+        const res = await fetch(`${url}?${query}`);
+        const page = await res.json();
+        if (gen !== generation) return;
+        if (!res.ok) throw new Error(page.error);
+        const fragment = document.createDocumentFragment();
+        columnsToItems(page.columns).forEach((item) =>
+          fragment.appendChild(renderRow(item))
+        );
+        tbody.appendChild(fragment);
+        cursor = page.next_cursor;
+        more.hidden = !cursor;
+      } catch (err) {
+        console.error(`Error fetching ${url}:`, err);
+      } finally {
+        if (gen === generation) loading = false;
+      }
+    }
+
+    function reload(newParams) {
+      params = newParams;
+      cursor = null;
+      generation++;
+      loading = false;
+      tbody.innerHTML = "";
+      more.hidden = true;
+      loadPage();
+    }
+
+    more.addEventListener("click", loadPage);
+    new IntersectionObserver((entries) => {
+      if (entries[0].isIntersecting && cursor) loadPage();
+    }).observe(more);
+
+    const form = document.querySelector("form.list-filters");
+    if (form) {
+      const formParams = () => {
+        const p = new URLSearchParams();
+        new FormData(form).forEach((v, k) => v && p.set(k, v));
+        return p;
+      };
+      let typingTimer;
+      form.addEventListener("submit", (e) => e.preventDefault());
+      form.addEventListener("change", () => reload(formParams()));
+      form.addEventListener("input", (e) => {
+        if (e.target.type !== "search" && e.target.type !== "text") return;
+        clearTimeout(typingTimer);
+        typingTimer = setTimeout(() => reload(formParams()), 300);
+      });
+      reload(formParams());
+    } else {
+      reload(params);
+    }
+  }
+
+  // {name: [values]} (format=columns) back to one object per row
+  function columnsToItems(columns) {
+    const names = Object.keys(columns);
+    const count = names.length ? columns[names[0]].length : 0;
+    const items = new Array(count);
+    for (let i = 0; i < count; i++) {
+      const item = {};
+      names.forEach((name) => (item[name] = columns[name][i]));
+      items[i] = item;
+    }
+    return items;
+  }
+
+  // Collect cell edits and send them as one bulk PATCH (a single
+  // transaction on the server) once no edit has come in for EDIT_DELAY_MS.
+  // Edits to the same row are merged; pending ones are flushed when the
+  // page is hidden. onSaved gets the parsed response.
+  const EDIT_DELAY_MS = 800;
+
+  function editQueue(url, key, onSaved) {
+    const pending = new Map(); // key value -> {key: value, field: value, ...}
+    let timer = null;
+
+    function add(id, fields) {
+      pending.set(id, Object.assign(pending.get(id) || { [key]: id }, fields));
+      clearTimeout(timer);
+      timer = setTimeout(flush, EDIT_DELAY_MS);
+    }
+
+    async function flush(keepalive = false) {
+      clearTimeout(timer);
+      if (!pending.size) return;
+      const updates = [...pending.values()];
+      pending.clear();
+      try {
+        const res = await fetch(url, {
+          method: "PATCH",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify(updates),
+          keepalive,
+        });
+        if (!res.ok) {
+          console.error(`Bulk update of ${url} failed:`, await res.text());
+          return;
+        }
+        if (onSaved) onSaved(await res.json());
+      } catch (err) {
+        // Network error: put the edits back (newer ones win) and retry later
+        updates.forEach((u) => add(u[key], Object.assign({}, u, pending.get(u[key]))));
+        console.error(`Error saving edits to ${url}:`, err);
+      }
+    }
+
+    document.addEventListener("visibilitychange", () => {
+      if (document.visibilityState === "hidden") flush(true);
+    });
+    return { add };
+  }
+
+  // 3. Render sold items, a page at a time
+  const soldBody = document.querySelector("#sold-items-table tbody");
+  if (soldBody) {
+    pagedTable(
+      "/api/sold-items",
+      soldBody,
+      [
+        "order_id",
+        "item_title",
+        "sold_date",
+        "item_cost",
+        "sold_for_price",
+        "net_return",
+        "roi",
+        "net_profit_margin",
+        "time_to_sell",
+        "purchased_at",
+      ],
+      renderSoldRow
+    );
+  }
+
+  const soldEdits = editQueue("/api/sold-items", "order_id", (json) =>
+    showSoldMetrics(json.items || [])
+  );
+
+  function renderSoldRow(item) {
+    // 1. Format sold_date
+    const soldDateFormatted = item.sold_date
+      ? new Date(item.sold_date).toLocaleDateString("en-US", {
+          year: "numeric",
+          month: "long",
+          day: "numeric",
+        })
+      : "";
+
+    const row = document.createElement("tr");
+    row.dataset.orderId = item.order_id;
+    row.dataset.transactionId = item.transaction_id;
+
+    row.innerHTML = `
           <td class="title-cell">${item.item_title ?? ""}</td>
           <td>${soldDateFormatted}</td>
           <td contenteditable="true" data-field="item_cost">
@@ -44,22 +198,10 @@ document.addEventListener("DOMContentLoaded", () => {
           <td data-field="sold_for_price">
             ${item.sold_for_price != null ? "$" + item.sold_for_price : ""}
           </td>
-          <td data-field="net_return">
-            ${
-              item.net_return != null
-                ? "$" + parseFloat(item.net_return).toFixed(2)
-                : ""
-            }
-          </td>
-          <td data-field="roi">
-            ${item.roi != null ? Math.round(item.roi) + "%" : ""}
-          </td>
+          <td data-field="net_return">${formatNetReturn(item.net_return)}</td>
+          <td data-field="roi">${formatPercent(item.roi)}</td>
           <td data-field="net_profit_margin">
-            ${
-              item.net_profit_margin != null
-                ? Math.round(item.net_profit_margin) + "%"
-                : ""
-            }
+            ${formatPercent(item.net_profit_margin)}
           </td>
           <td>
             ${item.time_to_sell != null ? item.time_to_sell + " Days" : ""}
@@ -68,142 +210,100 @@ document.addEventListener("DOMContentLoaded", () => {
             ${item.purchased_at ?? ""}
           </td>
         `;
-          tableBody.appendChild(row);
-        });
-        // 3. Attach blur event listeners to editable cells
-        tableBody
-          .querySelectorAll('td[contenteditable="true"]')
-          .forEach((cell) => {
-            cell.addEventListener("blur", async (e) => {
-              console.log(
-                "🟢 blur fired for",
-                e.target.dataset.field,
-                "order:",
-                e.target.closest("tr").dataset.orderId
-              );
-
-              // Wrap the entire body in try/catch
-              try {
-                const td = e.target;
-                const newValue = td.innerText.trim();
-                const field = td.dataset.field;
-                const row = td.closest("tr");
-                const orderId = row.dataset.orderId;
-
-                // Prepare payload
-                const updates = {};
-
-                if (field === "item_cost") {
-                  // Parse values for recalculation
-                  const soldFor = parseFloat(row.dataset.soldForPrice) || 0;
-                  const shippingPaid =
-                    parseFloat(row.dataset.shippingPaid) || 0;
-                  const finalFee = parseFloat(row.dataset.finalFee) || 0;
-                  const fixedFinalFee =
-                    parseFloat(row.dataset.fixedFinalFee) || 0;
-                  const international =
-                    parseFloat(row.dataset.internationalFee) || 0;
-                  const costToShip = parseFloat(row.dataset.costToShip) || 0;
-                  const itemCost = parseFloat(newValue) || 0;
-
-                  console.log({
-                    soldFor,
-                    shippingPaid,
-                    finalFee,
-                    fixedFinalFee,
-                    international,
-                    costToShip,
-                    itemCost,
-                  });
-                  // Recalculate
-                  const netReturn =
-                    soldFor +
-                    shippingPaid -
-                    (finalFee +
-                      fixedFinalFee +
-                      international +
-                      costToShip +
-                      itemCost);
-                  const roi = itemCost > 0 ? (netReturn / itemCost) * 100 : 0;
-                  const netProfitMargin =
-                    soldFor + shippingPaid > 0
-                      ? (netReturn / (soldFor + shippingPaid)) * 100
-                      : 0;
-
-                  console.log({ netReturn, roi, netProfitMargin });
-
-                  // Update UI
-                  row.querySelector('td[data-field="net_return"]').innerText =
-                    netReturn.toFixed(2);
-                  row.querySelector('td[data-field="roi"]').innerText =
-                    roi.toFixed(2);
-                  row.querySelector(
-                    'td[data-field="net_profit_margin"]'
-                  ).innerText = netProfitMargin.toFixed(2);
-
-                  // Build updates payload
-                  updates.item_cost = itemCost;
-                  updates.net_return = netReturn;
-                  updates.roi = roi;
-                  updates.net_profit_margin = netProfitMargin;
-                } else {
-                  updates[field] = newValue;
-                }
-
-                console.log(
-                  "🔵 About to PATCH /api/sold-items/" + orderId,
-                  updates
-                );
-
-                // Now this should definitely execute
-                const res = await fetch(`/api/sold-items/${orderId}`, {
-                  method: "PATCH",
-                  headers: { "Content-Type": "application/json" },
-                  body: JSON.stringify(updates),
-                });
-
-                console.log("🔵 PATCH response status:", res.status);
-                if (!res.ok) {
-                  console.error("🔴 Update failed:", await res.text());
-                }
-              } catch (err) {
-                console.error("🛑 Error in blur handler:", err);
-              }
-            });
-          });
-      }
-    })
-    .catch((error) => console.error("Error fetching sold items:", error));
-
-  // 4. Fetch and render inventory items data
-  fetch("/api/inventory-items")
-    .then((response) => response.json())
-    .then((data) => {
-      const invBody = document.querySelector("#inventory-items-table tbody");
-      if (invBody && Array.isArray(data)) {
-        data.forEach((item) => {
-          // 1) Compute "Listed For" as days since list_date
-          let listedFor = "";
-          if (item.list_date) {
-            const dt = new Date(item.list_date);
-            const diffMs = Date.now() - dt.getTime();
-            const diffDays = Math.floor(diffMs / (1000 * 60 * 60 * 24));
-            listedFor = diffDays + " Days";
-          }
-
-          // 2) Optional: format list_date as "April 22, 2025"
-          const listDateFormatted = item.list_date
-            ? new Date(item.list_date).toLocaleDateString("en-US", {
-                year: "numeric",
-                month: "long",
-                day: "numeric",
-              })
-            : "";
-
-          const row = document.createElement("tr");
-          row.dataset.itemId = item.item_id;
-
-          row.innerHTML = `
+    // 3. Attach blur event listeners to editable cells
+    row
+      .querySelectorAll('td[contenteditable="true"]')
+      .forEach((cell) => cell.addEventListener("blur", saveSoldCell));
+    return row;
+  }
+
+  function formatNetReturn(value) {
+    return value != null ? "$" + parseFloat(value).toFixed(2) : "";
+  }
+
+  function formatPercent(value) {
+    return value != null ? Math.round(value) + "%" : "";
+  }
+
+  // Show the metrics the server recomputed after an edit
+  function showSoldMetrics(items) {
+    items.forEach((item) => {
+      const row = soldBody.querySelector(
+        `tr[data-order-id="${CSS.escape(item.order_id)}"]` +
+          `[data-transaction-id="${CSS.escape(item.transaction_id)}"]`
+      );
+      if (!row) return;
+      row.querySelector('td[data-field="net_return"]').innerText =
+        formatNetReturn(item.net_return);
+      row.querySelector('td[data-field="roi"]').innerText = formatPercent(
+        item.roi
+      );
+      row.querySelector('td[data-field="net_profit_margin"]').innerText =
+        formatPercent(item.net_profit_margin);
+    });
+  }
+
+  function saveSoldCell(e) {
+    const td = e.target;
+    const newValue = td.innerText.trim();
+    const field = td.dataset.field;
+    const orderId = td.closest("tr").dataset.orderId;
+
+    const updates = {};
+    if (field === "item_cost") {
+      // net_return, roi and net_profit_margin are recomputed by the server
+      updates.item_cost = parseFloat(newValue) || 0;
+    } else {
+      updates[field] = newValue;
+    }
+    soldEdits.add(orderId, updates);
+  }
+
+  // 4. Render inventory items, a page at a time
+  const invBody = document.querySelector("#inventory-items-table tbody");
+  if (invBody) {
+    pagedTable(
+      "/api/inventory-items",
+      invBody,
+      [
+        "item_id",
+        "item_title",
+        "list_date",
+        "storage_location",
+        "list_price",
+        "item_cost",
+        "purchased_at",
+        "sku",
+      ],
+      renderInventoryRow
+    );
+  }
+
+  const inventoryEdits = editQueue("/api/inventory-items", "item_id");
+
+  function renderInventoryRow(item) {
+    // 1) Compute "Listed For" as days since list_date
+    let listedFor = "";
+    if (item.list_date) {
+      const dt = new Date(item.list_date);
+      const diffMs = Date.now() - dt.getTime();
+      const diffDays = Math.floor(diffMs / (1000 * 60 * 60 * 24));
+      listedFor = diffDays + " Days";
+    }
+
+    // 2) Optional: format list_date as "April 22, 2025"
+    const listDateFormatted = item.list_date
+      ? new Date(item.list_date).toLocaleDateString("en-US", {
+          year: "numeric",
+          month: "long",
+          day: "numeric",
+        })
+      : "";
+
+    const row = document.createElement("tr");
+    row.dataset.itemId = item.item_id;
+
+    row.innerHTML = `
           <td>${item.item_title ?? ""}</td>
           <td>${listedFor}</td>
           <td contenteditable="true" data-field="storage_location">${
@@ -227,46 +327,29 @@ document.addEventListener("DOMContentLoaded", () => {
           <td>${listDateFormatted}</td>
           <td contenteditable="true" data-field="sku">${item.sku ?? ""}</td>
         `;
-          invBody.appendChild(row);
-        });
+    // 5. Attach blur listeners for item_cost and purchased_at
+    row
+      .querySelectorAll('td[contenteditable="true"]')
+      .forEach((cell) => cell.addEventListener("blur", saveInventoryCell));
+    return row;
+  }
 
-        // 5. Attach blur listeners for item_cost and purchased_at
-        invBody
-          .querySelectorAll('td[contenteditable="true"]')
-          .forEach((cell) => {
-            cell.addEventListener("blur", async (e) => {
-              const td = e.target;
-              const newValue = td.innerText.trim();
-              const field = td.dataset.field; // "item_cost" or "purchased_at"
-              const row = td.closest("tr");
-              const itemId = row.dataset.itemId;
-
-              const payload = {};
-              if (field === "item_cost") {
-                // strip non-numeric and parse
-                const num = parseFloat(newValue.replace(/[^0-9.-]/g, "")) || 0;
-                payload[field] = num;
-              } else {
-                payload[field] = newValue;
-              }
-
-              try {
-                const res = await fetch(`/api/inventory-items/${itemId}`, {
-                  method: "PATCH",
-                  headers: { "Content-Type": "application/json" },
-                  body: JSON.stringify(payload),
-                });
-                if (!res.ok) {
-                  console.error("Inventory update failed:", await res.text());
-                }
-              } catch (err) {
-                console.error("Error updating inventory:", err);
-              }
-            });
-          });
-      }
-    })
-    .catch((err) => console.error("Error fetching inventory items:", err));
+  function saveInventoryCell(e) {
+    const td = e.target;
+    const newValue = td.innerText.trim();
+    const field = td.dataset.field; // "item_cost" or "purchased_at"
+    const itemId = td.closest("tr").dataset.itemId;
+
+    const payload = {};
+    if (field === "item_cost") {
+      // strip non-numeric and parse
+      const num = parseFloat(newValue.replace(/[^0-9.-]/g, "")) || 0;
+      payload[field] = num;
+    } else {
+      payload[field] = newValue;
+    }
+    inventoryEdits.add(itemId, payload);
+  }
 
   // ────────────────────────────────────
   // Insights page: Google AreaChart
@@ -299,15 +382,22 @@ document.addEventListener("DOMContentLoaded", () => {
       drawActivityChart();
     }
 
-    async function drawInsightsChart() {
+    // last responses, so a resize only redraws instead of refetching
+    let insightsJson = null;
+    let activityRows = null;
+
+    async function drawInsightsChart(refetch = true) {
       console.time("renderSoldTable");
 
-      const start = startInput.value;
-      const end = endInput.value;
-      const res = await fetch(
-        `/api/insights-data?start_date=${start}&end_date=${end}`
-      );
-      const json = await res.json();
+      if (refetch || !insightsJson) {
+        const start = startInput.value;
+        const end = endInput.value;
+        const res = await fetch(
+          `/api/insights-data?start_date=${start}&end_date=${end}`
+        );
+        insightsJson = await res.json();
+      }
+      const json = insightsJson;
       const rows = json.data;
       const {
         total_gross,
@@ -375,13 +465,16 @@ document.addEventListener("DOMContentLoaded", () => {
       console.timeEnd("renderSoldTable");
     }
 
-    async function drawActivityChart() {
-      const start = startInput.value;
-      const end = endInput.value;
-      const res = await fetch(
-        `/api/insights-activity-data?start_date=${start}&end_date=${end}`
-      );
-      const rows = await res.json();
+    async function drawActivityChart(refetch = true) {
+      if (refetch || !activityRows) {
+        const start = startInput.value;
+        const end = endInput.value;
+        const res = await fetch(
+          `/api/insights-activity-data?start_date=${start}&end_date=${end}`
+        );
+        activityRows = await res.json();
+      }
+      const rows = activityRows;
 
       const totalListings = rows.reduce(
         (sum, r) => sum + (r.listings_count || 0),
@@ -417,10 +510,14 @@ document.addEventListener("DOMContentLoaded", () => {
         options2
       );
     }
-    // keep it responsive
+    // keep it responsive: redraw from the cached data once resizing settles
+    let resizeTimer;
     window.addEventListener("resize", () => {
-      drawInsightsChart();
-      drawActivityChart();
+      clearTimeout(resizeTimer);
+      resizeTimer = setTimeout(() => {
+        drawInsightsChart(false);
+        drawActivityChart(false);
+      }, 150);
     });
   }
 });
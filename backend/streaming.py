@@ -0,0 +1,48 @@
+"""
+Streamed JSON bodies for exports too large to build in memory: rows are
+read from the cursor with fetchmany() and encoded a batch at a time, so
+memory stays flat however many rows there are and the first bytes go out
+as soon as the first batch is read.
+"""
+import json
+
+BATCH_SIZE = 500
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def iter_batches(cursor, batch_size=BATCH_SIZE):
+    """
+    Row dicts of the cursor's current query, in lists of up to batch_size.
+    """
+    columns = [c[0] for c in cursor.description]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield [dict(zip(columns, row)) for row in rows]
+
+
+def _dumps(obj):
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def ndjson(batches):
+    """
+    One JSON object per line.
+    """
+    for batch in batches:
+        yield "".join(_dumps(row) + "\n" for row in batch)
+
+
+def json_array(batches):
+    """
+    A single JSON array, sent in chunks.
+    """
+    yield "["
+    first = True
+    for batch in batches:
+        chunk = ",".join(_dumps(row) for row in batch)
+        yield chunk if first else "," + chunk
+        first = False
+    yield "]"
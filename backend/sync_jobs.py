@@ -0,0 +1,134 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Finished jobs kept around so clients can still poll their final status
+MAX_FINISHED_JOBS = 50
+
+
+class SyncJob:
+    """
+    Progress of one eBay sync run. Phases report into it from their own
+    threads, so every update goes through a lock.
+    """
+
+    def __init__(self, seller_id, kind="sync"):
+        self.id = uuid.uuid4().hex
+        self.seller_id = seller_id
+        self.kind = kind                # sync | backfill
+        self.status = "queued"          # queued | running | succeeded | failed
+        self.phase = "queued"
+        self.active_phases = set()
+        self.pages_fetched = {}
+        self.rows_written = {}
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def set_phase(self, phase):
+        with self._lock:
+            self.phase = phase
+
+    def begin(self, name):
+        with self._lock:
+            self.active_phases.add(name)
+            self.pages_fetched.setdefault(name, 0)
+            self.rows_written.setdefault(name, 0)
+
+    def end(self, name):
+        with self._lock:
+            self.active_phases.discard(name)
+
+    def page_fetched(self, name, n=1):
+        with self._lock:
+            self.pages_fetched[name] = self.pages_fetched.get(name, 0) + n
+
+    def rows_stored(self, name, n):
+        with self._lock:
+            self.rows_written[name] = self.rows_written.get(name, 0) + n
+
+    @property
+    def done(self):
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self):
+        with self._lock:
+            if self.started_at is None:
+                elapsed = 0.0
+            else:
+                elapsed = (self.finished_at or time.time()) - self.started_at
+            return {
+                "job_id":        self.id,
+                "kind":          self.kind,
+                "status":        self.status,
+                "phase":         self.phase,
+                "active_phases": sorted(self.active_phases),
+                "pages_fetched": dict(self.pages_fetched, total=sum(self.pages_fetched.values())),
+                "rows_written":  dict(self.rows_written, total=sum(self.rows_written.values())),
+                "elapsed":       round(elapsed, 2),
+                "error":         self.error,
+            }
+
+
+class SyncJobRunner:
+    """
+    Runs sync jobs on background threads, at most one per seller and kind.
+    Asking for a sync while one is in flight returns the running job
+    instead of starting a duplicate.
+
+    Jobs live in process memory, so status is only visible to the worker
+    process that started them.
+    """
+
+    def __init__(self):
+        self._jobs = OrderedDict()
+        self._running = {}          # (seller_id, kind) -> SyncJob
+        self._lock = threading.Lock()
+
+    def start(self, seller_id, target, *args, kind="sync"):
+        """
+        Start target(job, *args) in the background for seller_id.
+        Returns (job, attached) where attached is True if an in-flight
+        job of the same kind was reused.
+        """
+        with self._lock:
+            running = self._running.get((seller_id, kind))
+            if running is not None:
+                return running, True
+            job = SyncJob(seller_id, kind)
+            self._jobs[job.id] = job
+            self._running[(seller_id, kind)] = job
+            self._prune()
+
+        thread = threading.Thread(
+            target=self._run, args=(job, target, args),
+            name=f"sync-{job.id[:8]}", daemon=True
+        )
+        thread.start()
+        return job, False
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, target, args):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            target(job, *args)
+            job.status = "succeeded"
+            job.set_phase("done")
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._running.pop((job.seller_id, job.kind), None)
+
+    def _prune(self):
+        finished = [jid for jid, j in self._jobs.items() if j.done]
+        for jid in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[jid]
@@ -0,0 +1,154 @@
+"""
+Raw Finances API events in 'transactions' (append-only, deduplicated by
+its primary key) and 'transactions_grouped', one row per order derived
+from them.
+
+A trigger on 'transactions' records the order of every event written in
+'transactions_dirty_orders' (see dirty_keys.py);
+refresh_transactions_grouped() regroups just those orders with one
+statement, so a sync never regroups the history.
+"""
+from dirty_keys import dirty_triggers, drain
+
+CREATE_TRIGGERS = dirty_triggers("transactions_grouped", "transactions", "transactions_dirty_orders",
+                                 {"order_id": "{row}.order_id"})
+
+# Regroup the dirty orders. Every event counts: amounts and fees of all
+# SALE / REFUND / DISPUTE / CREDIT events add up, as shipping labels do.
+# The line item is the earliest sale's. Orders left without events get no
+# row.
+REGROUP_DIRTY_ORDERS = """
+INSERT INTO transactions_grouped (
+    order_id, line_item_id, sale_amount, sale_transaction_date,
+    sale_final_value_fee, sale_fixed_final_value_fee, sale_international_fee,
+    shipping_label_amount, refund_amount, refund_final_value_fee,
+    refund_fixed_final_value_fee, dispute_amount, credit_amount
+)
+SELECT
+    t.order_id,
+    (SELECT s.line_item_id FROM transactions AS s
+     WHERE s.order_id = t.order_id AND s.transaction_type = 'SALE'
+     ORDER BY s.transaction_date, s.rowid LIMIT 1),
+    SUM(CASE WHEN t.transaction_type = 'SALE' THEN t.amount_value END),
+    MIN(CASE WHEN t.transaction_type = 'SALE' THEN t.transaction_date END),
+    SUM(t.sale_final_fee),
+    SUM(t.sale_fixed_fee),
+    SUM(t.sale_international_fee),
+    TOTAL(t.shipping_label_amount),
+    SUM(t.refund_amount),
+    SUM(t.refund_final_fee),
+    SUM(t.refund_fixed_fee),
+    SUM(t.dispute_amount),
+    SUM(t.credit_amount)
+FROM transactions AS t
+WHERE t.order_id IN (SELECT order_id FROM transactions_dirty_orders)
+GROUP BY t.order_id;
+"""
+
+FEE_COLUMNS = {
+    "SALE":   {"FINAL_VALUE_FEE": "sale_final_fee",
+               "FINAL_VALUE_FEE_FIXED_PER_ORDER": "sale_fixed_fee",
+               "INTERNATIONAL_FEE": "sale_international_fee"},
+    "REFUND": {"FINAL_VALUE_FEE": "refund_final_fee",
+               "FINAL_VALUE_FEE_FIXED_PER_ORDER": "refund_fixed_fee"},
+}
+
+# Column holding the amount of each event type other than SALE
+AMOUNT_COLUMNS = {
+    "SHIPPING_LABEL": "shipping_label_amount",
+    "REFUND":         "refund_amount",
+    "DISPUTE":        "dispute_amount",
+    "CREDIT":         "credit_amount",
+}
+
+ROW_COLUMNS = (
+    "order_id", "line_item_id", "transaction_type", "transaction_date",
+    "amount_value", "sale_final_fee", "sale_fixed_fee", "sale_international_fee",
+    "shipping_label_amount", "refund_amount", "refund_final_fee", "refund_fixed_fee",
+    "dispute_amount", "credit_amount",
+)
+
+INSERT_EVENTS = (f"INSERT OR IGNORE INTO transactions ({', '.join(ROW_COLUMNS)}) "
+                 f"VALUES ({', '.join('?' * len(ROW_COLUMNS))})")
+
+# Same, but events already stored take the new values (reprocess.py). The
+# UPDATE fires the dirty-order trigger, so their orders are regrouped.
+KEY_COLUMNS = ("order_id", "line_item_id", "transaction_type", "transaction_date")
+REPLACE_EVENTS = (INSERT_EVENTS.replace("INSERT OR IGNORE", "INSERT")
+                  + f" ON CONFLICT ({', '.join(KEY_COLUMNS)}) DO UPDATE SET "
+                  + ", ".join(f"{c} = excluded.{c}" for c in ROW_COLUMNS if c not in KEY_COLUMNS))
+
+
+def event_row(txn):
+    """
+    The 'transactions' row of one Finances API transaction. Missing order
+    and line item ids are stored as 'N/A' / '' rather than NULL, which the
+    primary key would not deduplicate.
+    """
+    ttype = txn.get("transactionType", "").upper()
+    line  = (txn.get("orderLineItems") or [{}])[0]
+    amt   = float(txn.get("amount", {}).get("value", 0.0))
+    row = dict.fromkeys(ROW_COLUMNS)
+    row.update(
+        order_id=txn.get("orderId", "N/A"),
+        line_item_id=line.get("lineItemId") or "",
+        transaction_type=ttype,
+        transaction_date=txn.get("transactionDate", ""),
+        amount_value=amt,
+    )
+    if ttype in AMOUNT_COLUMNS:
+        row[AMOUNT_COLUMNS[ttype]] = amt
+    fee_columns = FEE_COLUMNS.get(ttype, {})
+    for fee in line.get("marketplaceFees", []):
+        column = fee_columns.get(fee.get("feeType", ""))
+        if column:
+            row[column] = float(fee.get("amount", {}).get("value", 0.0))
+    return tuple(row[c] for c in ROW_COLUMNS)
+
+
+def ensure_transactions_grouped(cursor):
+    """
+    Create the triggers feeding 'transactions_dirty_orders' (the tables
+    come from db/schema.sql). Orders already grouped before the raw events
+    were kept stay as they are until new events arrive for them.
+    """
+    for sql in CREATE_TRIGGERS.values():
+        cursor.execute(sql)
+
+
+def store_events(cursor, rows, overwrite=False):
+    """
+    Append event_row() rows to 'transactions'; events already stored are
+    skipped, or with overwrite=True rewritten with the new values. Returns
+    the number of new events (of events written, with overwrite).
+    """
+    if not rows:
+        return 0
+    cursor.executemany(REPLACE_EVENTS if overwrite else INSERT_EVENTS, rows)
+    # rowcount doesn't include the trigger's inserts
+    return cursor.rowcount
+
+
+def refresh_transactions_grouped(cursor):
+    """
+    Regroup every dirty order (the caller commits). Returns the line item
+    ids of the regrouped orders, whose sold items need their fees updated.
+    """
+    n_orders, line_items = drain(cursor, "transactions_dirty_orders", _regroup_dirty_orders)
+    if n_orders:
+        print(f"Regrouped {n_orders} orders in 'transactions_grouped'.")
+    return line_items or set()
+
+
+def _regroup_dirty_orders(cursor):
+    cursor.execute("""
+    DELETE FROM transactions_grouped
+    WHERE order_id IN (SELECT order_id FROM transactions_dirty_orders)
+    """)
+    cursor.execute(REGROUP_DIRTY_ORDERS)
+    cursor.execute("""
+    SELECT line_item_id FROM transactions_grouped
+    WHERE order_id IN (SELECT order_id FROM transactions_dirty_orders)
+      AND line_item_id IS NOT NULL
+    """)
+    return {row[0] for row in cursor.fetchall()}
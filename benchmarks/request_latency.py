@@ -0,0 +1,102 @@
+"""
+Request latency of the SQLite-backed API routes under concurrent load,
+with pooled connections (db_pool) vs. a fresh connection per request
+(the old behaviour, reproduced with ConnectionPool(max_idle=0)).
+
+Builds a throwaway database from db/schema.sql with synthetic sold and
+inventory rows, then hammers a mix of read and PATCH requests from
+several threads through Flask's test client.
+
+Usage (from the repo root):
+    python benchmarks/request_latency.py [threads] [requests_per_thread]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+import app as tally
+from db_conn import ConnectionPool, connect
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+N_SOLD = 300
+N_INVENTORY = 300
+
+
+def build_db():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    conn = connect(path)
+    with open(os.path.join(ROOT, "db", "schema.sql")) as f:
+        conn.executescript(f.read())
+    conn.executemany(
+        "INSERT INTO sold_items (order_id, transaction_id, item_id, item_title, sold_date, "
+        "sold_for_price, net_return) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(f"O{i}", f"T{i}", f"I{i}", f"Item {i}", f"2025-0{1 + i % 9}-1{i % 10}T00:00:00.000Z",
+          10.0 + i % 50, 4.0 + i % 20) for i in range(N_SOLD)])
+    conn.executemany(
+        "INSERT INTO inventory_items (item_id, item_title, list_price, list_date) VALUES (?, ?, ?, ?)",
+        [(f"I{i}", f"Item {i}", 9.99, f"2025-0{1 + i % 9}-0{1 + i % 9}T00:00:00.000Z")
+         for i in range(N_INVENTORY)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def one_request(client, rng):
+    roll = rng.random()
+    if roll < 0.4:
+        return client.get("/api/insights-activity-data?start_date=2025-01-01&end_date=2025-01-31")
+    if roll < 0.7:
+        return client.get("/api/insights-data?start_date=2025-01-01&end_date=2025-09-30")
+    if roll < 0.85:
+        return client.patch(f"/api/sold-items/O{rng.randrange(N_SOLD)}", json={"item_cost": 1.5})
+    return client.patch(f"/api/inventory-items/I{rng.randrange(N_INVENTORY)}", json={"sku": "X"})
+
+
+def run(threads, per_thread):
+    latencies = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = tally.app.test_client()
+        out = []
+        for _ in range(per_thread):
+            t = time.perf_counter()
+            resp = one_request(client, rng)
+            out.append(time.perf_counter() - t)
+            assert resp.status_code == 200, resp.get_data(as_text=True)
+        return out
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for out in pool.map(worker, range(threads)):
+            latencies.extend(out)
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "req_s": len(latencies) / wall,
+    }
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    tally.db_path = build_db()
+
+    for label, pool in (("per-request connect", ConnectionPool(max_idle=0)),
+                        ("pooled", ConnectionPool(max_idle=threads))):
+        tally.db_pool = pool
+        run(threads, 10)            # warm up
+        r = run(threads, per_thread)
+        pool.close_all()
+        print(f"{label:20s} p50 {r['p50_ms']:6.2f} ms   p95 {r['p95_ms']:6.2f} ms   {r['req_s']:7.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
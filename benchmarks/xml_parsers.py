@@ -0,0 +1,141 @@
+"""
+Throughput comparison: BeautifulSoup (the old get_inventory_data /
+get_sold_list_data path) vs. the streaming iterparse parser in
+backend/ebay_xml.py, on synthetic 200-entry GetMyeBaySelling pages.
+
+Usage (from the repo root):
+    python benchmarks/xml_parsers.py [pages]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from bs4 import BeautifulSoup
+from ebay_xml import parse_active_items, parse_sold_transactions
+
+NS = "urn:ebay:apis:eBLBaseComponents"
+
+
+def item_xml(i):
+    return f"""<Item>
+      <BuyItNowPrice currencyID="USD">{i}.99</BuyItNowPrice>
+      <ItemID>{100000000000 + i}</ItemID>
+      <ListingDetails><StartTime>2024-03-01T10:00:00.000Z</StartTime>
+        <EndTime>2024-04-01T10:00:00.000Z</EndTime></ListingDetails>
+      <StartTime>2024-03-01T10:00:00.000Z</StartTime>
+      <EndTime>2024-04-01T10:00:00.000Z</EndTime>
+      <Quantity>3</Quantity>
+      <SellingStatus><CurrentPrice currencyID="USD">{i}.99</CurrentPrice>
+        <QuantitySold>1</QuantitySold></SellingStatus>
+      <ShippingDetails><ShippingServiceOptions>
+        <ShippingServiceCost currencyID="USD">4.50</ShippingServiceCost>
+      </ShippingServiceOptions></ShippingDetails>
+      <Title>Vintage widget number {i} with a reasonably long listing title</Title>
+      <QuantityAvailable>2</QuantityAvailable>
+      <SKU>SKU-{i}</SKU>
+      <PictureDetails><GalleryURL>https://i.ebayimg.com/images/g/{i}/s-l140.jpg</GalleryURL></PictureDetails>
+    </Item>"""
+
+
+def active_page(n=200):
+    items = "".join(item_xml(i) for i in range(n))
+    return (f'<?xml version="1.0" encoding="UTF-8"?><GetMyeBaySellingResponse xmlns="{NS}">'
+            f"<Ack>Success</Ack><ActiveList><ItemArray>{items}</ItemArray>"
+            "<PaginationResult><TotalNumberOfPages>1</TotalNumberOfPages></PaginationResult>"
+            "</ActiveList></GetMyeBaySellingResponse>").encode()
+
+
+def sold_page(n=200):
+    txns = "".join(
+        f"<OrderTransaction><Transaction><OrderLineItemID>{i}-{i}</OrderLineItemID>"
+        f"<TransactionID>{i}</TransactionID><TransactionPrice currencyID=\"USD\">{i}.50</TransactionPrice>"
+        f"{item_xml(i)}</Transaction></OrderTransaction>"
+        for i in range(n))
+    return (f'<?xml version="1.0" encoding="UTF-8"?><GetMyeBaySellingResponse xmlns="{NS}">'
+            f"<Ack>Success</Ack><SoldList><OrderTransactionArray>{txns}</OrderTransactionArray>"
+            "</SoldList></GetMyeBaySellingResponse>").encode()
+
+
+def bs4_active(content):
+    soup = BeautifulSoup(content.decode(), "xml")
+    out = []
+    for item in soup.find("ActiveList").find_all("Item"):
+        price = item.find("CurrentPrice") or item.find("BuyItNowPrice")
+        out.append((
+            item.find("ItemID").text if item.find("ItemID") else None,
+            item.find("Title").text if item.find("Title") else "",
+            item.find("PictureDetails").text if item.find("PictureDetails") else "",
+            float(price.text) if (price and price.text) else 0.0,
+            item.find("StartTime").text if item.find("StartTime") else "",
+            item.find("SKU").text if item.find("SKU") else "",
+            int(item.find("QuantityAvailable").text) if item.find("QuantityAvailable") else 0,
+        ))
+    return out
+
+
+def stream_active(content):
+    out = []
+    for item in parse_active_items(content):
+        price = item.get("CurrentPrice", item.get("BuyItNowPrice"))
+        out.append((
+            item.get("ItemID"),
+            item.get("Title", ""),
+            item.get("PictureDetails", ""),
+            float(price) if price else 0.0,
+            item.get("StartTime", ""),
+            item.get("SKU", ""),
+            int(item["QuantityAvailable"]) if "QuantityAvailable" in item else 0,
+        ))
+    return out
+
+
+def bs4_sold(content):
+    soup = BeautifulSoup(content.decode(), "xml")
+    out = []
+    for t in soup.find_all("Transaction"):
+        item = t.find("Item")
+        gallery = item.find("PictureDetails").find("GalleryURL")
+        out.append((
+            t.find("OrderLineItemID").text, t.find("TransactionID").text,
+            item.find("ItemID").text, item.find("Title").text, gallery.text,
+            item.find("StartTime").text, item.find("EndTime").text, item.find("SKU").text,
+            item.find("QuantitySold").text, t.find("TransactionPrice").text,
+            item.find("ShippingServiceCost").text,
+        ))
+    return out
+
+
+def stream_sold(content):
+    return [(
+        t["OrderLineItemID"], t["TransactionID"], t["ItemID"], t["Title"], t["GalleryURL"],
+        t["StartTime"], t["EndTime"], t["SKU"], t["QuantitySold"], t["TransactionPrice"],
+        t["ShippingServiceCost"],
+    ) for t in parse_sold_transactions(content)]
+
+
+def bench(name, fn, pages):
+    start = time.perf_counter()
+    for page in pages:
+        rows = fn(page)
+    elapsed = time.perf_counter() - start
+    n = len(rows) * len(pages)
+    print(f"{name:<24} {elapsed:7.3f}s  {n / elapsed:10.0f} records/s")
+    return rows
+
+
+def main():
+    n_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    for label, page, old, new in (
+        ("ActiveList", active_page(), bs4_active, stream_active),
+        ("SoldList", sold_page(), bs4_sold, stream_sold),
+    ):
+        pages = [page] * n_pages
+        print(f"{label}: {n_pages} pages x 200 records ({len(page) // 1024} KiB/page)")
+        a = bench("  bs4 (old path)", old, pages)
+        b = bench("  iterparse (ebay_xml)", new, pages)
+        assert a == b, "parsers disagree"
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
--- Create the transactions table.
+-- Create the transactions table: raw Finances API events, append-only.
 -- Note: The composite PRIMARY KEY ensures uniqueness based on order_id, line_item_id,
--- transaction_type, and transaction_date.
+-- transaction_type, and transaction_date, so re-read events are skipped
+-- (missing order / line item ids are stored as 'N/A' / '', not NULL).
 CREATE TABLE IF NOT EXISTS transactions (
     order_id TEXT,
     line_item_id TEXT,
@@ -46,9 +47,23 @@ CREATE TABLE IF NOT EXISTS sold_items (
     refund_to_buyer REAL,
     refund_owed REAL,
     refund_to_seller REAL,
+    -- YYYY-MM-DD of sold_date, indexed for the insights date filters
+    sold_day TEXT GENERATED ALWAYS AS (substr(sold_date, 1, 10)) VIRTUAL,
     PRIMARY KEY (order_id, transaction_id)
 );
 
+CREATE INDEX IF NOT EXISTS idx_sold_items_sold_day ON sold_items (sold_day);
+-- Fee lookups join sold items to transactions_grouped.line_item_id
+CREATE INDEX IF NOT EXISTS idx_sold_items_transaction_id ON sold_items (transaction_id);
+-- Keyset pagination of /api/sold-items: one index per sort option, on
+-- (sort column, primary key), plus the SKU filter
+CREATE INDEX IF NOT EXISTS idx_sold_items_sold_date ON sold_items (sold_date, order_id, transaction_id);
+CREATE INDEX IF NOT EXISTS idx_sold_items_sold_for_price ON sold_items (sold_for_price, order_id, transaction_id);
+CREATE INDEX IF NOT EXISTS idx_sold_items_net_return ON sold_items (net_return, order_id, transaction_id);
+CREATE INDEX IF NOT EXISTS idx_sold_items_sku ON sold_items (sku);
+
+-- One row per order, derived from transactions by backend/transactions_grouped.py
+-- (its trigger on transactions marks the orders new events belong to).
 CREATE TABLE IF NOT EXISTS transactions_grouped (
     order_id                     TEXT    PRIMARY KEY,
     line_item_id                 TEXT,
@@ -65,6 +80,13 @@ CREATE TABLE IF NOT EXISTS transactions_grouped (
     credit_amount                REAL
 );
 
+CREATE INDEX IF NOT EXISTS idx_transactions_grouped_line_item_id
+    ON transactions_grouped (line_item_id);
+
+CREATE TABLE IF NOT EXISTS transactions_dirty_orders (
+    order_id TEXT PRIMARY KEY
+);
+
 CREATE TABLE IF NOT EXISTS inventory_items (
     item_id             TEXT    PRIMARY KEY,
     item_title          TEXT,
@@ -75,5 +97,68 @@ CREATE TABLE IF NOT EXISTS inventory_items (
     available_quantity  INTEGER,
     purchased_at        TEXT,
     sku                 TEXT,
-    storage_location    TEXT
-);
\ No newline at end of file
+    storage_location    TEXT,
+    -- YYYY-MM-DD of list_date, indexed for the insights date filters
+    list_day            TEXT GENERATED ALWAYS AS (substr(list_date, 1, 10)) VIRTUAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_inventory_items_list_day ON inventory_items (list_day);
+-- Keyset pagination of /api/inventory-items (see sold_items above)
+CREATE INDEX IF NOT EXISTS idx_inventory_items_list_date ON inventory_items (list_date, item_id);
+CREATE INDEX IF NOT EXISTS idx_inventory_items_list_price ON inventory_items (list_price, item_id);
+CREATE INDEX IF NOT EXISTS idx_inventory_items_item_cost ON inventory_items (item_cost, item_id);
+CREATE INDEX IF NOT EXISTS idx_inventory_items_sku ON inventory_items (sku);
+
+-- Incremental sync bookkeeping: latest timestamp ingested per seller and resource.
+CREATE TABLE IF NOT EXISTS sync_state (
+    seller_id       TEXT,
+    resource        TEXT,
+    high_water_mark TEXT,
+    updated_at      TEXT,
+    PRIMARY KEY (seller_id, resource)
+);
+
+-- Sold-history backfill checkpoints: GetOrders windows already imported.
+CREATE TABLE IF NOT EXISTS backfill_windows (
+    seller_id    TEXT,
+    window_start TEXT,
+    window_end   TEXT,
+    orders       INTEGER,
+    completed_at TEXT,
+    PRIMARY KEY (seller_id, window_start)
+);
+
+-- Insights rollup: one row per day, kept current by backend/daily_stats.py
+-- (its triggers on sold_items / inventory_items mark the days a write touches).
+CREATE TABLE IF NOT EXISTS daily_stats (
+    day                TEXT    PRIMARY KEY,
+    sales_count        INTEGER NOT NULL DEFAULT 0,
+    gross              REAL,
+    net                REAL,
+    npm_sum            REAL,
+    npm_count          INTEGER NOT NULL DEFAULT 0,
+    marketplace_fees   REAL,
+    shipping_labels    REAL,
+    cost_of_goods_sold REAL,
+    listings_count     INTEGER NOT NULL DEFAULT 0,
+    spent_inventory    REAL
+);
+
+CREATE TABLE IF NOT EXISTS daily_stats_dirty (
+    day TEXT PRIMARY KEY
+);
+
+-- Sold items whose net_return / roi / net_profit_margin need recomputing,
+-- marked by the triggers of backend/sold_metrics.py
+CREATE TABLE IF NOT EXISTS sold_metrics_dirty (
+    order_id       TEXT,
+    transaction_id TEXT,
+    PRIMARY KEY (order_id, transaction_id)
+);
+
+-- Bumped by every sync and edit; keys the API's cached responses
+CREATE TABLE IF NOT EXISTS data_version (
+    id      INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0);
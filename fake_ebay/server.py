@@ -0,0 +1,490 @@
+"""
+Local stand-in for the eBay APIs Tally-O talks to, so a sync can be run,
+benchmarked and regression-tested without live credentials.
+
+Serves, on one host:
+    POST /ws/api.dll                       Trading API: GetMyeBaySelling
+                                           (ActiveList / SoldList) and GetOrders
+    GET  /sell/finances/v1/transaction     Finances API getTransactions
+    GET  /commerce/identity/v1/user/       Identity API (seller id)
+    GET  /oauth2/authorize                 OAuth consent (redirects straight back)
+    POST /identity/v1/oauth2/token         OAuth token exchange
+
+Data is generated on demand from the listing/transaction counts, so large
+accounts cost no memory. Every order has two Finances transactions (its
+SALE, then a SHIPPING_LABEL or, for one order in 25, a REFUND), and its
+TransactionID matches the Finances lineItemId as on real eBay.
+
+Usage (from the repo root):
+    python fake_ebay/server.py --listings 50000 --transactions 500000 \\
+        --latency 0.05 --error-rate 0.01 --throttle-rate 0.01
+    EBAY_API_BASE_URL=http://127.0.0.1:5055 python backend/app.py
+
+Record real eBay responses, then replay them:
+    python fake_ebay/server.py --record fixtures/
+    python fake_ebay/server.py --replay fixtures/
+
+Tokens are redacted from recorded fixtures, so they can be committed.
+The parser regression tests run over tests/fixtures and, with
+TALLY_FIXTURES set, over a recorded directory too:
+    TALLY_FIXTURES=fixtures/ python -m pytest tests
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+import requests
+from flask import Flask, Response, jsonify, redirect, request
+
+NS = "urn:ebay:apis:eBLBaseComponents"
+DATE_FMT = "%Y-%m-%dT%H:%M:%S.000Z"
+
+# Where --record forwards each path to
+UPSTREAM_HOSTS = {
+    "/ws/api.dll":               "https://api.ebay.com",
+    "/identity/v1/oauth2/token": "https://api.ebay.com",
+    "/sell/":                    "https://apiz.ebay.com",
+    "/commerce/":                "https://apiz.ebay.com",
+}
+
+# Response headers kept in recorded fixtures
+FIXTURE_HEADERS = ("Content-Type", "Retry-After")
+
+# Fields of an OAuth token response replaced before a fixture is written
+TOKEN_FIELDS = ("access_token", "refresh_token", "id_token")
+REDACTED = "REDACTED"
+
+
+class FakeAccount:
+    """
+    A deterministic seller account: `listings` active items and
+    transactions // 2 orders spread evenly over the `days` before `now`,
+    oldest first.
+    """
+
+    def __init__(self, listings, transactions, days=730, now=None):
+        self.listings = max(1, listings)
+        self.orders = max(1, transactions // 2)
+        self.now = now or datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        self.start = self.now - timedelta(days=days)
+        self.step = (self.now - self.start) / self.orders
+
+    # Listings
+
+    def item_id(self, i):
+        return str(110000000000 + i)
+
+    def price(self, k):
+        return 5 + (k * 37 % 9500) / 100
+
+    def listing(self, i):
+        start = self.now - timedelta(seconds=(i * 7919) % int((self.now - self.start).total_seconds()))
+        return {
+            "ItemID":            self.item_id(i),
+            "Title":             f"Fake listing {i}",
+            "GalleryURL":        f"https://i.ebayimg.com/fake/{i}/s-l140.jpg",
+            "Price":             self.price(i),
+            "StartTime":         start.strftime(DATE_FMT),
+            "SKU":               f"SKU-{i}",
+            "QuantityAvailable": 1 + i % 3,
+        }
+
+    # Orders
+
+    def order_time(self, k):
+        return self.start + self.step * (k + 1)
+
+    def order_index(self, when):
+        """
+        Index of the first order created at or after when.
+        """
+        k = int((when - self.start) / self.step) - 1
+        k = max(0, min(self.orders, k))
+        while k < self.orders and self.order_time(k) < when:
+            k += 1
+        while k > 0 and self.order_time(k - 1) >= when:
+            k -= 1
+        return k
+
+    def transaction_id(self, k):
+        return str(2000000000000 + k)
+
+    def order(self, k):
+        i = k % self.listings
+        created = self.order_time(k)
+        return {
+            "OrderID":          f"{10 + k % 90}-{k:05d}-{i % 100000:05d}",
+            "OrderLineItemID":  f"{self.item_id(i)}-{self.transaction_id(k)}",
+            "TransactionID":    self.transaction_id(k),
+            "ItemID":           self.item_id(i),
+            "Title":            f"Fake listing {i}",
+            "GalleryURL":       f"https://i.ebayimg.com/fake/{i}/s-l140.jpg",
+            "SKU":              f"SKU-{i}",
+            "Price":            self.price(k),
+            "Shipping":         4.5 + k % 5,
+            "CreatedDate":      created.strftime(DATE_FMT),
+            "StartTime":        (created - timedelta(days=1 + k % 60)).strftime(DATE_FMT),
+        }
+
+    # Finances transactions: 2 per order, dates strictly increasing
+
+    @property
+    def transactions(self):
+        return self.orders * 2
+
+    def transaction_time(self, n):
+        k, slot = divmod(n, 2)
+        return self.order_time(k) + self.step * (slot / 2)
+
+    def transaction_index(self, when):
+        """
+        Index of the first transaction dated at or after when.
+        """
+        n = max(0, 2 * self.order_index(when) - 2)
+        while n < self.transactions and self.transaction_time(n) < when:
+            n += 1
+        return n
+
+    def transaction(self, n):
+        k, slot = divmod(n, 2)
+        order = self.order(k)
+        price = order["Price"]
+        txn = {
+            "transactionId":   f"FT-{n:010d}",
+            "orderId":         order["OrderID"],
+            "transactionDate": self.transaction_time(n).strftime(DATE_FMT),
+            "transactionStatus": "PAYOUT",
+            "bookingEntry":    "CREDIT",
+        }
+        if slot == 0:
+            fees = [
+                {"feeType": "FINAL_VALUE_FEE", "amount": {"value": f"{price * 0.1325:.2f}", "currency": "USD"}},
+                {"feeType": "FINAL_VALUE_FEE_FIXED_PER_ORDER",
+                 "amount": {"value": "0.40" if price > 10 else "0.30", "currency": "USD"}},
+            ]
+            if k % 17 == 0:
+                fees.append({"feeType": "INTERNATIONAL_FEE",
+                             "amount": {"value": f"{price * 0.0165:.2f}", "currency": "USD"}})
+            txn.update(transactionType="SALE", amount={"value": f"{price:.2f}", "currency": "USD"})
+        elif k % 25 == 0:
+            fees = [
+                {"feeType": "FINAL_VALUE_FEE", "amount": {"value": f"{-price * 0.1325:.2f}", "currency": "USD"}},
+                {"feeType": "FINAL_VALUE_FEE_FIXED_PER_ORDER", "amount": {"value": "-0.40", "currency": "USD"}},
+            ]
+            txn.update(transactionType="REFUND", bookingEntry="DEBIT",
+                       amount={"value": f"{price:.2f}", "currency": "USD"})
+        else:
+            fees = []
+            txn.update(transactionType="SHIPPING_LABEL", bookingEntry="DEBIT",
+                       amount={"value": f"{order['Shipping']:.2f}", "currency": "USD"})
+        txn["orderLineItems"] = [{"lineItemId": order["TransactionID"], "marketplaceFees": fees}]
+        return txn
+
+
+# Trading API rendering
+
+def _tag(body, name, default=None):
+    m = re.search(rf"<{name}>\s*([^<]*?)\s*</{name}>", body)
+    return m.group(1) if m else default
+
+
+def _page(body, default_entries):
+    entries = int(_tag(body, "EntriesPerPage", default_entries))
+    page = int(_tag(body, "PageNumber", 1))
+    return max(1, entries), max(1, page)
+
+
+def _pagination(total, entries):
+    pages = (total + entries - 1) // entries
+    return (f"<PaginationResult><TotalNumberOfPages>{pages}</TotalNumberOfPages>"
+            f"<TotalNumberOfEntries>{total}</TotalNumberOfEntries></PaginationResult>")
+
+
+def _trading_response(call_name, inner, ack="Success"):
+    return (f'<?xml version="1.0" encoding="UTF-8"?><{call_name}Response xmlns="{NS}">'
+            f"<Timestamp>{datetime.utcnow().strftime(DATE_FMT)}</Timestamp><Ack>{ack}</Ack>"
+            f"<Version>967</Version>{inner}</{call_name}Response>")
+
+
+def active_list(account, body):
+    entries, page = _page(body, 200)
+    first = (page - 1) * entries
+    items = []
+    for i in range(first, min(first + entries, account.listings)):
+        it = account.listing(i)
+        items.append(
+            f"<Item><BuyItNowPrice currencyID=\"USD\">{it['Price']:.2f}</BuyItNowPrice>"
+            f"<ItemID>{it['ItemID']}</ItemID>"
+            f"<ListingDetails><StartTime>{it['StartTime']}</StartTime></ListingDetails>"
+            f"<SellingStatus><CurrentPrice currencyID=\"USD\">{it['Price']:.2f}</CurrentPrice></SellingStatus>"
+            f"<StartTime>{it['StartTime']}</StartTime><Title>{it['Title']}</Title>"
+            f"<QuantityAvailable>{it['QuantityAvailable']}</QuantityAvailable><SKU>{it['SKU']}</SKU>"
+            f"<PictureDetails><GalleryURL>{it['GalleryURL']}</GalleryURL></PictureDetails></Item>")
+    inner = (f"<ActiveList><ItemArray>{''.join(items)}</ItemArray>"
+             f"{_pagination(account.listings, entries)}</ActiveList>")
+    return _trading_response("GetMyeBaySelling", inner)
+
+
+def _sold_transaction(o):
+    return (f"<Transaction><OrderLineItemID>{o['OrderLineItemID']}</OrderLineItemID>"
+            f"<TransactionID>{o['TransactionID']}</TransactionID>"
+            f"<TransactionPrice currencyID=\"USD\">{o['Price']:.2f}</TransactionPrice>"
+            f"<QuantityPurchased>1</QuantityPurchased><CreatedDate>{o['CreatedDate']}</CreatedDate>"
+            f"<Item><ItemID>{o['ItemID']}</ItemID><Title>{o['Title']}</Title>"
+            f"<PictureDetails><GalleryURL>{o['GalleryURL']}</GalleryURL></PictureDetails>"
+            f"<ListingDetails><StartTime>{o['StartTime']}</StartTime><EndTime>{o['CreatedDate']}</EndTime></ListingDetails>"
+            f"<StartTime>{o['StartTime']}</StartTime><EndTime>{o['CreatedDate']}</EndTime>"
+            f"<SKU>{o['SKU']}</SKU><SellingStatus><QuantitySold>1</QuantitySold></SellingStatus>"
+            f"<ShippingDetails><ShippingServiceOptions><ShippingServiceCost currencyID=\"USD\">"
+            f"{o['Shipping']:.2f}</ShippingServiceCost></ShippingServiceOptions></ShippingDetails>"
+            f"</Item></Transaction>")
+
+
+def sold_list(account, body):
+    entries, page = _page(body, 200)
+    days = min(60, int(_tag(body, "DurationInDays", 60)))
+    lo = account.order_index(account.now - timedelta(days=days))
+    total = account.orders - lo
+    first = lo + (page - 1) * entries
+    txns = "".join(
+        f"<OrderTransaction>{_sold_transaction(account.order(k))}</OrderTransaction>"
+        for k in range(first, min(first + entries, account.orders)))
+    inner = (f"<SoldList><OrderTransactionArray>{txns}</OrderTransactionArray>"
+             f"{_pagination(total, entries)}</SoldList>")
+    return _trading_response("GetMyeBaySelling", inner)
+
+
+def get_orders(account, body):
+    entries, page = _page(body, 100)
+    try:
+        start = datetime.strptime(_tag(body, "CreateTimeFrom"), DATE_FMT)
+        end = datetime.strptime(_tag(body, "CreateTimeTo"), DATE_FMT)
+    except (TypeError, ValueError):
+        return _trading_response("GetOrders", "<Errors><ShortMessage>CreateTimeFrom and CreateTimeTo "
+                                              "are required.</ShortMessage></Errors>", ack="Failure")
+    lo, hi = account.order_index(start), account.order_index(end)
+    total = max(0, hi - lo)
+    first = lo + (page - 1) * entries
+    last = min(first + entries, hi)
+    orders = "".join(
+        f"<Order><OrderID>{account.order(k)['OrderID']}</OrderID><OrderStatus>Completed</OrderStatus>"
+        f"<TransactionArray>{_sold_transaction(account.order(k))}</TransactionArray></Order>"
+        for k in range(first, last))
+    inner = (f"{_pagination(total, entries)}<HasMoreOrders>{'true' if last < hi else 'false'}</HasMoreOrders>"
+             f"<OrderArray>{orders}</OrderArray>"
+             f"<OrdersPerPage>{entries}</OrdersPerPage><PageNumber>{page}</PageNumber>"
+             f"<ReturnedOrderCountActual>{max(0, last - first)}</ReturnedOrderCountActual>")
+    return _trading_response("GetOrders", inner)
+
+
+def finances_page(account, args):
+    limit = min(1000, int(args.get("limit", 20)))
+    offset = int(args.get("offset", 0))
+    lo = 0
+    m = re.match(r"transactionDate:\[(.*?)\.\.", args.get("filter", ""))
+    if m and m.group(1):
+        lo = account.transaction_index(datetime.strptime(m.group(1), DATE_FMT))
+    total = account.transactions - lo
+    first = lo + offset
+    txns = [account.transaction(n) for n in range(first, min(first + limit, account.transactions))]
+    return {"total": total, "limit": limit, "offset": offset, "transactions": txns}
+
+
+# Record / replay
+
+def fixture_key():
+    """
+    Stable key for the current request: method, path, sorted query and the
+    body with the auth token and inter-tag whitespace stripped.
+    """
+    body = request.get_data(as_text=True)
+    body = re.sub(r"<eBayAuthToken>.*?</eBayAuthToken>", "", body, flags=re.S)
+    body = re.sub(r">\s+<", "><", body).strip()
+    if request.path.endswith("/oauth2/token"):
+        body = ""
+    parts = [request.method, request.path, request.headers.get("X-EBAY-API-CALL-NAME", ""),
+             json.dumps(sorted(request.args.items(multi=True))), body]
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+def upstream_url():
+    for prefix, host in UPSTREAM_HOSTS.items():
+        if request.path.startswith(prefix):
+            return host + request.full_path.rstrip("?")
+    return None
+
+
+def caller_secrets():
+    """
+    Credentials the current request carries: the Authorization header's
+    token and any <eBayAuthToken> in the body.
+    """
+    secrets = set()
+    auth = request.headers.get("Authorization", "")
+    if auth:
+        secrets.add(auth.split(" ", 1)[-1])
+    secrets.update(re.findall(r"<eBayAuthToken>\s*(.*?)\s*</eBayAuthToken>",
+                              request.get_data(as_text=True), flags=re.S))
+    return {s for s in secrets if s}
+
+
+def redact(body):
+    """
+    body of an upstream response with every credential taken out, so
+    fixtures can be committed: the tokens of an OAuth token response,
+    <eBayAuthToken> elements and any echo of the caller's own tokens.
+    """
+    if request.path.endswith("/oauth2/token"):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return REDACTED
+        if isinstance(data, dict):
+            body = json.dumps({k: REDACTED if k in TOKEN_FIELDS else v for k, v in data.items()})
+    body = re.sub(r"(<eBayAuthToken>).*?(</eBayAuthToken>)", rf"\1{REDACTED}\2", body, flags=re.S)
+    for secret in caller_secrets():
+        body = body.replace(secret, REDACTED)
+    return body
+
+
+def record(fixtures_dir):
+    url = upstream_url()
+    if url is None:
+        return jsonify({"error": f"No upstream for {request.path}"}), 404
+    # The caller's credentials go upstream, but never into the fixture
+    headers = {k: v for k, v in request.headers if k.lower() not in ("host", "content-length")}
+    resp = requests.request(request.method, url, headers=headers, data=request.get_data(), timeout=120)
+    fixture = {
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "status": resp.status_code,
+        "headers": {k: resp.headers[k] for k in FIXTURE_HEADERS if k in resp.headers},
+        "body": redact(resp.text),
+    }
+    with open(os.path.join(fixtures_dir, fixture_key() + ".json"), "w") as f:
+        json.dump(fixture, f, indent=1)
+    return Response(resp.content, status=resp.status_code, headers=fixture["headers"])
+
+
+def replay(fixtures_dir):
+    path = os.path.join(fixtures_dir, fixture_key() + ".json")
+    if not os.path.exists(path):
+        return jsonify({"error": f"No recorded fixture for {request.method} {request.full_path}"}), 404
+    with open(path) as f:
+        fixture = json.load(f)
+    return Response(fixture["body"], status=fixture["status"], headers=fixture["headers"])
+
+
+# App
+
+def create_app(account, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0,
+               record_dir=None, replay_dir=None, seed=None):
+    app = Flask(__name__)
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0, "throttled": 0}
+
+    @app.before_request
+    def inject():
+        if request.path == "/_stats":
+            return None
+        stats["requests"] += 1
+        if latency or jitter:
+            time.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+        if record_dir:
+            return record(record_dir)
+        roll = rng.random()
+        if roll < throttle_rate:
+            stats["throttled"] += 1
+            resp = jsonify({"errors": [{"errorId": 2001, "message": "Too many requests."}]})
+            resp.status_code = 429
+            resp.headers["Retry-After"] = "1"
+            return resp
+        if roll < throttle_rate + error_rate:
+            stats["errors"] += 1
+            return jsonify({"errors": [{"errorId": 10001, "message": "Injected server error."}]}), 500
+        if replay_dir:
+            return replay(replay_dir)
+        return None
+
+    @app.route("/_stats")
+    def fake_stats():
+        return jsonify(stats)
+
+    @app.route("/ws/api.dll", methods=["POST"])
+    def trading():
+        call_name = request.headers.get("X-EBAY-API-CALL-NAME", "")
+        body = request.get_data(as_text=True)
+        if call_name == "GetMyeBaySelling" and "<SoldList>" in body:
+            xml = sold_list(account, body)
+        elif call_name == "GetMyeBaySelling":
+            xml = active_list(account, body)
+        elif call_name == "GetOrders":
+            xml = get_orders(account, body)
+        else:
+            xml = _trading_response(call_name or "Unknown", "<Errors><ShortMessage>Unsupported call "
+                                                            f"{call_name}.</ShortMessage></Errors>", ack="Failure")
+        return Response(xml, mimetype="text/xml")
+
+    @app.route("/sell/finances/v1/transaction")
+    def finances():
+        return jsonify(finances_page(account, request.args))
+
+    @app.route("/commerce/identity/v1/user/")
+    def identity():
+        return jsonify({"userId": "fake-seller", "username": "fake_seller"})
+
+    @app.route("/oauth2/authorize")
+    def authorize():
+        sep = "&" if "?" in request.args.get("redirect_uri", "") else "?"
+        return redirect(f"{request.args.get('redirect_uri', '/')}{sep}code=fake-code")
+
+    @app.route("/identity/v1/oauth2/token", methods=["POST"])
+    def token():
+        return jsonify({
+            "access_token": "fake-access-token",
+            "token_type": "User Access Token",
+            "expires_in": 7200,
+            "refresh_token": "fake-refresh-token",
+            "refresh_token_expires_in": 47304000,
+        })
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local fake of the eBay APIs Tally-O uses.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--listings", type=int, default=1000, help="active listings")
+    parser.add_argument("--transactions", type=int, default=10000, help="Finances transactions (2 per order)")
+    parser.add_argument("--days", type=int, default=730, help="days of order history")
+    parser.add_argument("--now", help="fixed 'now' (YYYY-MM-DD) for reproducible data")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--seed", type=int, help="seed for latency/error injection")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="DIR", help="proxy to real eBay and save responses in DIR")
+    mode.add_argument("--replay", metavar="DIR", help="serve responses recorded in DIR")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+    now = datetime.strptime(args.now, "%Y-%m-%d") if args.now else None
+    account = FakeAccount(args.listings, args.transactions, args.days, now)
+    app = create_app(account, args.latency, args.jitter, args.error_rate, args.throttle_rate,
+                     args.record, args.replay, args.seed)
+    print(f"Fake eBay on http://{args.host}:{args.port}: {account.listings} listings, "
+          f"{account.orders} orders, {account.transactions} transactions", file=sys.stderr)
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
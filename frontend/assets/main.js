@@ -32,13 +32,19 @@ document.addEventListener("DOMContentLoaded", () => {
     })
     .catch((error) => console.error("Error fetching transactions:", error));
 
-  // 3. Fetch and render sold items data
-  fetch("/api/sold-items")
-    .then((response) => response.json())
-    .then((data) => {
-      const tableBody = document.querySelector("#sold-items-table tbody");
-      if (tableBody && Array.isArray(data)) {
-        data.forEach((item) => {
+  // 3. Fetch and render sold items data, page by page (the API returns
+  //    {items, next_cursor}; each next_cursor asks for the following page)
+  const soldBody = document.querySelector("#sold-items-table tbody");
+  const loadSoldPage = (cursor) => {
+    const query = new URLSearchParams({
+      fields: "order_id,item_title,sold_date,sold_for_price",
+    });
+    if (cursor) query.set("cursor", cursor);
+    return fetch(`/api/sold-items?${query}`)
+      .then((response) => response.json())
+      .then((page) => {
+        if (!soldBody || !Array.isArray(page.items)) return;
+        page.items.forEach((item) => {
           const row = document.createElement("tr");
           row.innerHTML = `
               <td>${item.order_id}</td>
@@ -46,9 +52,10 @@ document.addEventListener("DOMContentLoaded", () => {
               <td>${item.sold_date}</td>
               <td>${item.sold_for_price}</td>
             `;
-          tableBody.appendChild(row);
+          soldBody.appendChild(row);
         });
-      }
-    })
-    .catch((error) => console.error("Error fetching sold items:", error));
+        if (page.next_cursor) return loadSoldPage(page.next_cursor);
+      });
+  };
+  loadSoldPage(null).catch((error) => console.error("Error fetching sold items:", error));
 });
@@ -0,0 +1,17 @@
+import json
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path[:0] = [os.path.join(ROOT, "backend"), os.path.join(ROOT, "fake_ebay")]
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name):
+    """
+    The recorded fixture tests/fixtures/<name>.json (the format
+    fake_ebay/server.py --record writes).
+    """
+    with open(os.path.join(FIXTURES_DIR, name + ".json")) as f:
+        return json.load(f)
@@ -0,0 +1,19 @@
+"""
+ebay_client.fetch_all_transactions: a failed page keeps the pages before it.
+"""
+import pytest
+
+import ebay_client
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_failed_page_keeps_earlier_pages(monkeypatch, max_workers):
+    def page(headers, params, offset, limit, on_body=None):
+        if offset == 2 * limit:
+            raise RuntimeError("eBay getTransactions failed (500)")
+        return {"total": 5 * limit, "transactions": [{"offset": offset}]}
+
+    monkeypatch.setattr(ebay_client, "get_transactions_page", page)
+    with pytest.raises(RuntimeError) as info:
+        ebay_client.fetch_all_transactions({}, {}, max_workers=max_workers, limit=10)
+    assert info.value.transactions == [{"offset": 0}, {"offset": 10}]
@@ -0,0 +1,47 @@
+"""
+reprocess.py: replaying the archive rewrites what is stored, so a fixed
+parser reaches data synced before the fix.
+"""
+import sqlite3
+
+import reprocess
+from conftest import load_fixture
+from payload_archive import PayloadArchive, archive_path
+
+
+def make_db(tmp_path):
+    # reprocess() creates the database itself
+    db = str(tmp_path / "tally0.db")
+    archive = PayloadArchive(archive_path(db))
+    archive.store("orders", load_fixture("get_orders")["body"])
+    archive.store("transactions", load_fixture("transactions")["body"])
+    archive.close()
+    return db
+
+
+def snapshot(db):
+    conn = sqlite3.connect(db)
+    state = (
+        conn.execute("SELECT * FROM transactions ORDER BY 1, 2, 3, 4").fetchall(),
+        conn.execute("SELECT * FROM transactions_grouped ORDER BY 1").fetchall(),
+        conn.execute("SELECT order_id, item_title, sold_for_price FROM sold_items ORDER BY 1").fetchall(),
+    )
+    conn.close()
+    return state
+
+
+def test_reprocess_restores_stored_values(tmp_path):
+    db = make_db(tmp_path)
+    reprocess.reprocess(db, ["orders", "transactions"], workers=1)
+    expected = snapshot(db)
+    assert expected[0] and expected[2]
+
+    conn = sqlite3.connect(db)
+    conn.execute("UPDATE transactions SET sale_final_fee = 999 WHERE transaction_type = 'SALE'")
+    conn.execute("UPDATE transactions_grouped SET sale_final_value_fee = 999")
+    conn.execute("UPDATE sold_items SET item_title = 'STALE', sold_for_price = 0")
+    conn.commit()
+    conn.close()
+
+    reprocess.reprocess(db, ["orders", "transactions"], workers=1)
+    assert snapshot(db) == expected